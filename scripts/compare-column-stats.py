@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Comparaison des statistiques du planificateur (pg_stats) entre PROD et TEST
+Usage:
+  python compare-column-stats.py --tables public.lofts public.transactions
+  python compare-column-stats.py --save-prod prod_stats.json --save-test test_stats.json
+  python compare-column-stats.py --prod-file prod_stats.json --test-file test_stats.json --script sync-stats.sql
+
+Même avec des schémas identiques (compare_schemas()), les requêtes sur lofts et
+transactions peuvent être planifiées différemment en TEST et en PROD : les
+estimations de sélectivité viennent de pg_stats (null_frac, n_distinct, valeurs
+les plus fréquentes, corrélation). Ce script signale les colonnes dont les
+statistiques divergent assez pour changer ces estimations, et peut générer un
+script SQL pour aligner TEST (cibles de statistiques, n_distinct, statistiques
+étendues) avant un ANALYZE.
+"""
+
+import argparse
+import json
+import math
+import sys
+
+# Configuration des connexions (à adapter selon votre environnement)
+PROD_CONFIG = {
+    'host': 'prod-db-host',
+    'database': 'your_prod_db',
+    'user': 'your_user',
+    'password': 'your_password'
+}
+
+TEST_CONFIG = {
+    'host': 'test-db-host',
+    'database': 'your_test_db',
+    'user': 'your_user',
+    'password': 'your_password'
+}
+
+DEFAULT_TABLES = ['public.lofts', 'public.transactions']
+
+# Seuils au-delà desquels une différence change les estimations du planificateur
+THRESHOLDS = {
+    'null_frac': 0.05,       # écart absolu de fraction de NULL
+    'n_distinct_ratio': 2.0,  # facteur entre nombres de valeurs distinctes
+    'correlation': 0.3,      # écart absolu de corrélation (coût des index scans)
+    'mcv': 0.2,              # distance entre distributions des valeurs fréquentes
+    'reltuples_ratio': 2.0,  # facteur entre nombres de lignes estimés
+}
+
+def normalize_table(table):
+    """Qualifie un nom de table nu avec le schéma public"""
+    return table if '.' in table else f"public.{table}"
+
+def get_column_stats(config, tables, env_name):
+    """Récupère pg_stats, les cibles de statistiques et les statistiques étendues"""
+    try:
+        import psycopg2
+
+        conn = psycopg2.connect(**config)
+        cur = conn.cursor()
+
+        cur.execute("""
+            SELECT n.nspname || '.' || c.relname, c.reltuples
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname || '.' || c.relname = ANY(%s);
+        """, (list(tables),))
+        stats = {table: {'reltuples': reltuples, 'columns': {}, 'extended': []} for table, reltuples in cur.fetchall()}
+
+        cur.execute("""
+            SELECT
+                s.schemaname || '.' || s.tablename,
+                s.attname,
+                s.null_frac,
+                s.n_distinct,
+                s.most_common_vals::text::text[],
+                s.most_common_freqs,
+                s.correlation,
+                a.attstattarget
+            FROM pg_stats s
+            JOIN pg_attribute a
+              ON a.attrelid = (quote_ident(s.schemaname) || '.' || quote_ident(s.tablename))::regclass
+             AND a.attname = s.attname
+            WHERE s.schemaname || '.' || s.tablename = ANY(%s) AND NOT s.inherited;
+        """, (list(tables),))
+        for table, column, null_frac, n_distinct, mcv, mcf, correlation, target in cur.fetchall():
+            stats[table]['columns'][column] = {
+                'null_frac': null_frac,
+                'n_distinct': n_distinct,
+                'most_common_vals': mcv or [],
+                'most_common_freqs': mcf or [],
+                'correlation': correlation,
+                'stattarget': target
+            }
+
+        cur.execute("""
+            SELECT n.nspname || '.' || c.relname, s.stxname, pg_get_statisticsobjdef(s.oid)
+            FROM pg_statistic_ext s
+            JOIN pg_class c ON c.oid = s.stxrelid
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname || '.' || c.relname = ANY(%s);
+        """, (list(tables),))
+        for table, name, definition in cur.fetchall():
+            stats[table]['extended'].append({'name': name, 'definition': definition})
+
+        conn.close()
+        return stats
+
+    except Exception as e:
+        print(f"Erreur connexion {env_name}: {e}")
+        return None
+
+def absolute_n_distinct(n_distinct, reltuples):
+    """n_distinct négatif = fraction des lignes ; on le ramène à un nombre absolu"""
+    if n_distinct is None:
+        return None
+    if n_distinct < 0:
+        return -n_distinct * max(reltuples or 0, 0)
+    return n_distinct
+
+def value_frequencies(column, reltuples):
+    """Fréquence estimée de chaque valeur fréquente, et estimation pour les autres"""
+    freqs = dict(zip(column['most_common_vals'], column['most_common_freqs']))
+    distinct = absolute_n_distinct(column['n_distinct'], reltuples) or 0
+    remaining = max(distinct - len(freqs), 1)
+    # Même règle que le planificateur pour une valeur absente de la liste
+    other = max(1 - sum(freqs.values()) - (column['null_frac'] or 0), 0) / remaining
+    return freqs, other
+
+def mcv_divergence(prod_col, test_col, prod_rows, test_rows):
+    """Écart maximal de sélectivité estimée sur l'union des valeurs fréquentes"""
+    prod_freqs, prod_other = value_frequencies(prod_col, prod_rows)
+    test_freqs, test_other = value_frequencies(test_col, test_rows)
+    values = set(prod_freqs) | set(test_freqs)
+    if not values:
+        return 0.0
+    return max(abs(prod_freqs.get(v, prod_other) - test_freqs.get(v, test_other)) for v in values)
+
+def ratio(a, b):
+    """Facteur entre deux quantités positives (1.0 si égales)"""
+    if not a and not b:
+        return 1.0
+    if not a or not b:
+        return math.inf
+    return max(a, b) / min(a, b)
+
+def compare_stats(prod_stats, test_stats, tables=None, thresholds=THRESHOLDS):
+    """Compare les statistiques colonne par colonne et retourne les divergences
+
+    tables restreint la comparaison aux tables demandées ; celles qui n'existent
+    dans aucun des deux environnements sont signalées plutôt qu'ignorées.
+    """
+    differences = {
+        'missing_tables_in_test': [],
+        'missing_tables_in_prod': [],
+        'unknown_tables': [],
+        'missing_stats_in_test': [],
+        'missing_stats_in_prod': [],
+        'table_size_differences': [],
+        'column_differences': [],
+        'missing_extended_in_test': [],
+        'summary': {}
+    }
+
+    if tables is None:
+        tables = set(prod_stats) | set(test_stats)
+    for table in sorted(set(tables)):
+        prod_table = prod_stats.get(table)
+        test_table = test_stats.get(table)
+        if not prod_table and not test_table:
+            differences['unknown_tables'].append(table)
+            continue
+        if not test_table:
+            differences['missing_tables_in_test'].append(table)
+            continue
+        if not prod_table:
+            differences['missing_tables_in_prod'].append(table)
+            continue
+
+        # reltuples vaut -1 pour une table jamais analysée (PostgreSQL 14+)
+        prod_rows = max(prod_table['reltuples'] or 0, 0)
+        test_rows = max(test_table['reltuples'] or 0, 0)
+        if ratio(prod_rows, test_rows) >= thresholds['reltuples_ratio']:
+            differences['table_size_differences'].append({
+                'table': table,
+                'prod_rows': prod_rows,
+                'test_rows': test_rows
+            })
+
+        test_extended = {ext['name'] for ext in test_table['extended']}
+        for ext in prod_table['extended']:
+            if ext['name'] not in test_extended:
+                differences['missing_extended_in_test'].append({'table': table, **ext})
+
+        prod_columns = prod_table['columns']
+        test_columns = test_table['columns']
+        for column in sorted(set(prod_columns) | set(test_columns)):
+            name = f"{table}.{column}"
+            if column not in test_columns:
+                differences['missing_stats_in_test'].append(name)
+                continue
+            if column not in prod_columns:
+                differences['missing_stats_in_prod'].append(name)
+                continue
+
+            prod_col = prod_columns[column]
+            test_col = test_columns[column]
+            reasons = []
+
+            prod_nulls = prod_col['null_frac'] or 0
+            test_nulls = test_col['null_frac'] or 0
+            if abs(prod_nulls - test_nulls) >= thresholds['null_frac']:
+                reasons.append(f"null_frac {prod_nulls:.3f} vs {test_nulls:.3f}")
+
+            prod_distinct = absolute_n_distinct(prod_col['n_distinct'], prod_rows)
+            test_distinct = absolute_n_distinct(test_col['n_distinct'], test_rows)
+            if (prod_distinct is not None and test_distinct is not None
+                    and ratio(prod_distinct, test_distinct) >= thresholds['n_distinct_ratio']):
+                reasons.append(f"n_distinct {prod_distinct:.0f} vs {test_distinct:.0f}")
+
+            if prod_col['correlation'] is not None and test_col['correlation'] is not None:
+                if abs(prod_col['correlation'] - test_col['correlation']) >= thresholds['correlation']:
+                    reasons.append(f"correlation {prod_col['correlation']:.2f} vs {test_col['correlation']:.2f}")
+
+            divergence = mcv_divergence(prod_col, test_col, prod_rows, test_rows)
+            if divergence >= thresholds['mcv']:
+                reasons.append(f"valeurs fréquentes (écart de sélectivité {divergence:.2f})")
+
+            if reasons:
+                differences['column_differences'].append({
+                    'column': name,
+                    'reasons': reasons,
+                    'prod': prod_col,
+                    'test': test_col
+                })
+
+    differences['summary'] = {
+        'total_missing_tables_in_test': len(differences['missing_tables_in_test']),
+        'total_missing_tables_in_prod': len(differences['missing_tables_in_prod']),
+        'total_unknown_tables': len(differences['unknown_tables']),
+        'total_missing_stats_in_test': len(differences['missing_stats_in_test']),
+        'total_missing_stats_in_prod': len(differences['missing_stats_in_prod']),
+        'total_table_size_differences': len(differences['table_size_differences']),
+        'total_column_differences': len(differences['column_differences']),
+        'total_missing_extended_in_test': len(differences['missing_extended_in_test'])
+    }
+    return differences
+
+def generate_report(differences):
+    """Génère un rapport lisible"""
+    report = []
+    report.append("=" * 60)
+    report.append("RAPPORT DE COMPARAISON STATISTIQUES PROD vs TEST")
+    report.append("=" * 60)
+    report.append("")
+
+    summary = differences['summary']
+    report.append("📊 RÉSUMÉ:")
+    report.append(f"• Tables absentes de TEST: {summary['total_missing_tables_in_test']}")
+    report.append(f"• Tables absentes de PROD: {summary['total_missing_tables_in_prod']}")
+    report.append(f"• Tables introuvables dans les deux environnements: {summary['total_unknown_tables']}")
+    report.append(f"• Colonnes sans statistiques dans TEST: {summary['total_missing_stats_in_test']}")
+    report.append(f"• Colonnes sans statistiques dans PROD: {summary['total_missing_stats_in_prod']}")
+    report.append(f"• Tables de taille très différente: {summary['total_table_size_differences']}")
+    report.append(f"• Colonnes aux statistiques divergentes: {summary['total_column_differences']}")
+    report.append(f"• Statistiques étendues manquantes dans TEST: {summary['total_missing_extended_in_test']}")
+    report.append("")
+
+    if differences['unknown_tables']:
+        report.append("❓ TABLES INTROUVABLES (nom erroné ?):")
+        for table in differences['unknown_tables']:
+            report.append(f"  - {table}")
+        report.append("")
+
+    if differences['missing_tables_in_test']:
+        report.append("🚨 TABLES ABSENTES DE TEST:")
+        for table in differences['missing_tables_in_test']:
+            report.append(f"  - {table}")
+        report.append("")
+
+    if differences['missing_tables_in_prod']:
+        report.append("⚠️  TABLES ABSENTES DE PROD:")
+        for table in differences['missing_tables_in_prod']:
+            report.append(f"  - {table}")
+        report.append("")
+
+    if differences['missing_stats_in_test']:
+        report.append("🚨 COLONNES SANS STATISTIQUES DANS TEST (ANALYZE à lancer):")
+        for column in differences['missing_stats_in_test']:
+            report.append(f"  - {column}")
+        report.append("")
+
+    if differences['missing_stats_in_prod']:
+        report.append("⚠️  COLONNES SANS STATISTIQUES DANS PROD:")
+        for column in differences['missing_stats_in_prod']:
+            report.append(f"  - {column}")
+        report.append("")
+
+    if differences['table_size_differences']:
+        report.append("📏 TAILLES DE TABLES:")
+        for diff in differences['table_size_differences']:
+            report.append(f"  - {diff['table']}: PROD({diff['prod_rows']:.0f} lignes) vs TEST({diff['test_rows']:.0f} lignes)")
+        report.append("")
+
+    if differences['column_differences']:
+        report.append("🔄 STATISTIQUES DIVERGENTES:")
+        for diff in differences['column_differences']:
+            report.append(f"  - {diff['column']}:")
+            for reason in diff['reasons']:
+                report.append(f"      • {reason}")
+        report.append("")
+
+    if differences['missing_extended_in_test']:
+        report.append("🧩 STATISTIQUES ÉTENDUES MANQUANTES DANS TEST:")
+        for ext in differences['missing_extended_in_test']:
+            report.append(f"  - {ext['table']}: {ext['name']}")
+        report.append("")
+
+    return "\n".join(report)
+
+def quote_table(table):
+    return '.'.join(f'"{part}"' for part in table.split('.', 1))
+
+def generate_sync_script(differences, stattarget=1000):
+    """Génère le SQL à exécuter sur TEST pour rapprocher ses statistiques de PROD
+
+    - n_distinct de PROD figé sur les colonnes divergentes (les valeurs négatives
+      restent des fractions et suivent donc la taille de la table TEST) ;
+    - cible de statistiques relevée pour élargir la liste des valeurs fréquentes ;
+    - statistiques étendues de PROD recréées ;
+    - ANALYZE des tables concernées.
+    """
+    lines = ["-- Alignement des statistiques TEST sur PROD", "BEGIN;", ""]
+    tables = set()
+
+    for diff in differences['column_differences']:
+        table, column = diff['column'].rsplit('.', 1)
+        tables.add(table)
+        prod = diff['prod']
+        target = max(prod['stattarget'] or 0, stattarget)
+        lines.append(f'ALTER TABLE {quote_table(table)} ALTER COLUMN "{column}" SET STATISTICS {target};')
+        if prod['n_distinct'] is not None and any(r.startswith('n_distinct') for r in diff['reasons']):
+            lines.append(f'ALTER TABLE {quote_table(table)} ALTER COLUMN "{column}" SET (n_distinct = {prod["n_distinct"]});')
+
+    for ext in differences['missing_extended_in_test']:
+        tables.add(ext['table'])
+        lines.append(f"{ext['definition']};")
+
+    for column in differences['missing_stats_in_test']:
+        tables.add(column.rsplit('.', 1)[0])
+
+    lines.append("")
+    lines.append("COMMIT;")
+    lines.append("")
+    for table in sorted(tables):
+        lines.append(f"ANALYZE {quote_table(table)};")
+    return "\n".join(lines) + "\n"
+
+def load_stats(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_stats(stats, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(stats, f, indent=2, ensure_ascii=False, default=str)
+    print(f"Statistiques sauvegardées dans: {path}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Comparaison pg_stats PROD vs TEST")
+    parser.add_argument('--tables', nargs='+',
+                        help=f"Tables à comparer, schema.table ou nom nu (public). Défaut: {' '.join(DEFAULT_TABLES)}, "
+                             "ou toutes les tables des fichiers --prod-file/--test-file")
+    parser.add_argument('--prod-file', help="Statistiques PROD sauvegardées (au lieu de PROD_CONFIG)")
+    parser.add_argument('--test-file', help="Statistiques TEST sauvegardées (au lieu de TEST_CONFIG)")
+    parser.add_argument('--save-prod', help="Sauvegarde les statistiques PROD en JSON")
+    parser.add_argument('--save-test', help="Sauvegarde les statistiques TEST en JSON")
+    parser.add_argument('--script', help="Écrit le script SQL d'alignement pour TEST")
+    parser.add_argument('--stattarget', type=int, default=1000,
+                        help="Cible de statistiques minimale pour les colonnes divergentes")
+    args = parser.parse_args(argv)
+
+    if args.tables:
+        tables = [normalize_table(table) for table in args.tables]
+    elif args.prod_file and args.test_file:
+        tables = None
+    else:
+        tables = DEFAULT_TABLES
+
+    prod_stats = load_stats(args.prod_file) if args.prod_file else get_column_stats(PROD_CONFIG, tables, "PROD")
+    test_stats = load_stats(args.test_file) if args.test_file else get_column_stats(TEST_CONFIG, tables, "TEST")
+    if prod_stats is None or test_stats is None:
+        return 1
+
+    if args.save_prod:
+        save_stats(prod_stats, args.save_prod)
+    if args.save_test:
+        save_stats(test_stats, args.save_test)
+
+    differences = compare_stats(prod_stats, test_stats, tables)
+    print(generate_report(differences))
+
+    if args.script:
+        with open(args.script, 'w', encoding='utf-8') as f:
+            f.write(generate_sync_script(differences, args.stattarget))
+        print(f"Script d'alignement généré: {args.script}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Index des dumps SQL pour restaurer une seule table sans rejouer tout le fichier
+Usage:
+  python dump-table-index.py sql-backup/prod_backup.sql --list
+  python dump-table-index.py sql-backup/prod_backup.sql --extract public.lofts transactions -o lofts.sql
+  python dump-table-index.py sql-backup/prod_backup.sql --restore lofts --dsn "postgresql://..."
+
+Le dump est mappé en mémoire une seule fois et un index des positions (en
+octets) de chaque CREATE TABLE, bloc COPY et série d'INSERT est enregistré à
+côté du dump (<dump>.index.json). L'index n'est recalculé que si la taille ou
+la date de modification du dump change.
+"""
+
+import argparse
+import json
+import mmap
+import os
+import re
+import sys
+from collections import defaultdict
+
+INDEX_VERSION = 2
+
+# Début d'instruction indexée : CREATE TABLE, COPY ou INSERT INTO
+STATEMENT_RE = re.compile(
+    rb'(?:(?P<create>CREATE\s+(?:UNLOGGED\s+)?TABLE(?:\s+IF\s+NOT\s+EXISTS)?)|(?P<copy>COPY)|(?P<insert>INSERT\s+INTO))'
+    rb'\s+(?P<name>(?:"[^"]+"|[\w$]+)(?:\.(?:"[^"]+"|[\w$]+))?)',
+    re.IGNORECASE
+)
+# Caractères qui changent le contexte lexical d'une instruction SQL
+SPECIAL_RE = re.compile(rb"--|/\*|[;'\"$]")
+DOLLAR_TAG_RE = re.compile(rb'\$(?:[A-Za-z_][A-Za-z_0-9]*)?\$')
+COPY_FROM_STDIN_RE = re.compile(rb'FROM\s+stdin', re.IGNORECASE)
+# Fin des données COPY : ligne "\." (fins de ligne LF ou CRLF)
+COPY_END_RE = re.compile(rb'^\\\.\r?(?:\n|\Z)', re.MULTILINE)
+
+def normalize_table_name(name):
+    """Normalise un nom de table au format schema.table (schéma public par défaut)"""
+    parts = [part.strip().strip('"') for part in name.split('.', 1)]
+    if len(parts) == 1:
+        parts.insert(0, 'public')
+    return '.'.join(parts)
+
+def index_path_for(dump_path):
+    """Chemin du fichier d'index associé à un dump"""
+    return f"{dump_path}.index.json"
+
+def is_identifier_byte(mm, pos):
+    """Vrai si l'octet à pos peut faire partie d'un identifiant SQL"""
+    return pos >= 0 and (mm[pos:pos + 1].isalnum() or mm[pos:pos + 1] in (b'_', b'$'))
+
+def skip_line_comment(mm, pos):
+    newline = mm.find(b'\n', pos)
+    return len(mm) if newline == -1 else newline + 1
+
+def skip_block_comment(mm, pos):
+    """Fin d'un commentaire /* */ (imbriqués comme dans PostgreSQL)"""
+    depth = 1
+    while depth:
+        opening = mm.find(b'/*', pos)
+        closing = mm.find(b'*/', pos)
+        if closing == -1:
+            return len(mm)
+        if opening != -1 and opening < closing:
+            depth += 1
+            pos = opening + 2
+        else:
+            depth -= 1
+            pos = closing + 2
+    return pos
+
+def skip_quoted(mm, pos, quote, backslash_escapes=False):
+    """Fin d'une chaîne ou d'un identifiant entre guillemets ('' ou "" doublés)"""
+    size = len(mm)
+    while True:
+        end = mm.find(quote, pos)
+        if end == -1:
+            return size
+        if backslash_escapes:
+            # E'...' : un guillemet précédé d'un nombre impair de \ est échappé
+            backslashes = 0
+            while mm[end - 1 - backslashes:end - backslashes] == b'\\':
+                backslashes += 1
+            if backslashes % 2:
+                pos = end + 1
+                continue
+        if mm[end + 1:end + 2] == quote:
+            pos = end + 2
+            continue
+        return end + 1
+
+def skip_space_and_comments(mm, pos):
+    """Avance jusqu'au prochain caractère significatif"""
+    size = len(mm)
+    while pos < size:
+        if mm[pos:pos + 1].isspace():
+            pos += 1
+        elif mm[pos:pos + 2] == b'--':
+            pos = skip_line_comment(mm, pos + 2)
+        elif mm[pos:pos + 2] == b'/*':
+            pos = skip_block_comment(mm, pos + 2)
+        else:
+            break
+    return pos
+
+def find_statement_end(mm, start):
+    """Position juste après le ';' qui termine l'instruction commençant à start
+
+    Les ';' situés dans une chaîne ('...', E'...'), un identifiant entre
+    guillemets, un bloc $tag$...$tag$ ou un commentaire (--, /* */) sont ignorés.
+    """
+    size = len(mm)
+    pos = start
+    while True:
+        match = SPECIAL_RE.search(mm, pos)
+        if not match:
+            return size
+        token = match.group()
+        at = match.start()
+        pos = match.end()
+        if token == b';':
+            return pos
+        if token == b'--':
+            pos = skip_line_comment(mm, pos)
+        elif token == b'/*':
+            pos = skip_block_comment(mm, pos)
+        elif token == b"'":
+            escaped = mm[at - 1:at] in (b'E', b'e') and not is_identifier_byte(mm, at - 2)
+            pos = skip_quoted(mm, pos, b"'", backslash_escapes=escaped)
+        elif token == b'"':
+            pos = skip_quoted(mm, pos, b'"')
+        elif not is_identifier_byte(mm, at - 1):
+            tag = DOLLAR_TAG_RE.match(mm, at)
+            if tag:
+                closing = mm.find(tag.group(), tag.end())
+                pos = size if closing == -1 else closing + len(tag.group())
+
+def build_index(mm):
+    """Parcourt le dump instruction par instruction
+
+    Retourne {table: [{kind, start, end}, ...]} ; les blocs COPY ... FROM stdin
+    portent aussi data_start/data_end, les bornes des lignes de données.
+    """
+    entries = defaultdict(list)
+    size = len(mm)
+    pos = skip_space_and_comments(mm, 0)
+    while pos < size:
+        start = pos
+        if mm[start:start + 1] == b'\\':
+            # Méta-commande psql (\connect, \restrict...) : une ligne, sans ';'
+            pos = skip_space_and_comments(mm, skip_line_comment(mm, start))
+            continue
+        end = find_statement_end(mm, start)
+        match = STATEMENT_RE.match(mm, start)
+        entry = None
+
+        if match and match.group('copy') and COPY_FROM_STDIN_RE.search(mm, start, end):
+            newline = mm.find(b'\n', end)
+            data_start = size if newline == -1 else newline + 1
+            terminator = COPY_END_RE.search(mm, data_start)
+            data_end = terminator.start() if terminator else size
+            end = terminator.end() if terminator else size
+            entry = {'kind': 'copy', 'start': start, 'end': end,
+                     'data_start': data_start, 'data_end': data_end}
+        elif match:
+            kind = 'copy' if match.group('copy') else 'create' if match.group('create') else 'insert'
+            entry = {'kind': kind, 'start': start, 'end': end}
+
+        if entry:
+            table = normalize_table_name(match.group('name').decode('utf-8'))
+            previous = entries[table][-1] if entries[table] else None
+            if (entry['kind'] == 'insert' and previous and previous['kind'] == 'insert'
+                    and not mm[previous['end']:start].strip()):
+                # Série d'INSERT consécutifs sur la même table : une seule entrée
+                previous['end'] = end
+            else:
+                entries[table].append(entry)
+        pos = skip_space_and_comments(mm, end)
+    return dict(entries)
+
+def open_dump(dump_path):
+    """Mappe le dump en mémoire (None pour un fichier vide, non mappable)"""
+    with open(dump_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def load_index(dump_path, mm=None):
+    """Charge l'index du dump, en le reconstruisant si le dump a changé"""
+    stat = os.stat(dump_path)
+    index_path = index_path_for(dump_path)
+
+    if os.path.exists(index_path):
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if (index.get('version') == INDEX_VERSION and index.get('size') == stat.st_size
+                    and index.get('mtime') == stat.st_mtime):
+                return index
+        except (OSError, ValueError):
+            pass
+
+    owned = mm is None
+    if owned:
+        mm = open_dump(dump_path)
+    try:
+        entries = build_index(mm) if mm is not None else {}
+    finally:
+        if owned and mm is not None:
+            mm.close()
+
+    index = {
+        'version': INDEX_VERSION,
+        'dump': os.path.basename(dump_path),
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'tables': entries
+    }
+    with open(index_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2)
+    return index
+
+def resolve_tables(index, names):
+    """Associe les noms demandés (lofts, public.lofts, "public"."lofts") aux tables de l'index"""
+    resolved = []
+    for name in names:
+        table = normalize_table_name(name)
+        if table not in index['tables']:
+            raise KeyError(f"Table absente du dump: {table}")
+        resolved.append(table)
+    return resolved
+
+def iter_sections(index, tables, kinds=('create', 'copy', 'insert')):
+    """Sections à rejouer : toutes les créations d'abord, puis les données"""
+    for phase in (('create',), ('copy', 'insert')):
+        for table in tables:
+            for entry in index['tables'][table]:
+                if entry['kind'] in phase and entry['kind'] in kinds:
+                    yield table, entry
+
+def extract_tables(mm, index, tables, output, kinds=('create', 'copy', 'insert')):
+    """Écrit les sections des tables demandées dans output (fichier binaire)"""
+    written = 0
+    for table, entry in iter_sections(index, tables, kinds):
+        output.write(f"-- {table} ({entry['kind']})\n".encode('utf-8'))
+        output.write(mm[entry['start']:entry['end']])
+        output.write(b'\n')
+        written += entry['end'] - entry['start']
+    return written
+
+class SectionReader:
+    """Flux en lecture sur une portion du dump, pour copy_expert sans copie intégrale"""
+
+    def __init__(self, mm, start, end):
+        self.mm = mm
+        self.pos = start
+        self.end = end
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.end - self.pos
+        chunk = self.mm[self.pos:min(self.pos + size, self.end)]
+        self.pos += len(chunk)
+        return chunk
+
+    def readline(self, size=-1):
+        newline = self.mm.find(b'\n', self.pos, self.end)
+        stop = self.end if newline == -1 else newline + 1
+        if size is not None and size >= 0:
+            stop = min(stop, self.pos + size)
+        chunk = self.mm[self.pos:stop]
+        self.pos = stop
+        return chunk
+
+def restore_tables(mm, index, tables, dsn, kinds=('create', 'copy', 'insert'), truncate=False):
+    """Rejoue les sections des tables demandées sur une base, dans une seule transaction"""
+    import psycopg2
+
+    conn = psycopg2.connect(dsn)
+    try:
+        cur = conn.cursor()
+        if truncate:
+            cur.execute('TRUNCATE ' + ', '.join(
+                '.'.join(f'"{part}"' for part in table.split('.', 1)) for table in tables
+            ))
+        for table, entry in iter_sections(index, tables, kinds):
+            if 'data_start' in entry:
+                # L'en-tête est la commande COPY, la suite le flux de données
+                command = mm[entry['start']:entry['data_start']].decode('utf-8').strip()
+                cur.copy_expert(command, SectionReader(mm, entry['data_start'], entry['data_end']))
+            else:
+                cur.execute(mm[entry['start']:entry['end']].decode('utf-8'))
+            print(f"✅ {table}: {entry['kind']} rejoué")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extraction/restauration sélective de tables depuis un dump SQL")
+    parser.add_argument('dump', help="Fichier dump (ex: sql-backup/prod_backup.sql)")
+    parser.add_argument('--list', action='store_true', help="Liste les tables indexées")
+    parser.add_argument('--extract', nargs='+', metavar='TABLE', help="Tables à extraire")
+    parser.add_argument('--restore', nargs='+', metavar='TABLE', help="Tables à restaurer")
+    parser.add_argument('-o', '--output', help="Fichier de sortie pour --extract (stdout par défaut)")
+    parser.add_argument('--dsn', help="Base cible pour --restore")
+    parser.add_argument('--data-only', action='store_true', help="Ignore les CREATE TABLE")
+    parser.add_argument('--truncate', action='store_true', help="Vide les tables avant --restore")
+    args = parser.parse_args(argv)
+
+    if args.restore and not args.dsn:
+        parser.error("--restore nécessite --dsn")
+
+    kinds = ('copy', 'insert') if args.data_only else ('create', 'copy', 'insert')
+    mm = open_dump(args.dump)
+    try:
+        index = load_index(args.dump, mm)
+
+        if args.list or not (args.extract or args.restore):
+            print(f"📦 {args.dump} ({index['size']} octets, {len(index['tables'])} tables)")
+            for table in sorted(index['tables']):
+                sections = index['tables'][table]
+                size = sum(entry['end'] - entry['start'] for entry in sections)
+                kinds_found = ', '.join(sorted({entry['kind'] for entry in sections}))
+                print(f"  - {table.ljust(45)}{str(size).rjust(12)} octets  [{kinds_found}]")
+
+        if args.extract:
+            try:
+                tables = resolve_tables(index, args.extract)
+            except KeyError as e:
+                parser.error(e.args[0])
+            if args.output:
+                with open(args.output, 'wb') as f:
+                    written = extract_tables(mm, index, tables, f, kinds)
+                print(f"✅ {written} octets extraits dans {args.output}")
+            else:
+                extract_tables(mm, index, tables, sys.stdout.buffer, kinds)
+
+        if args.restore:
+            try:
+                tables = resolve_tables(index, args.restore)
+            except KeyError as e:
+                parser.error(e.args[0])
+            restore_tables(mm, index, tables, args.dsn, kinds, args.truncate)
+    finally:
+        if mm is not None:
+            mm.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,564 @@
+#!/usr/bin/env python3
+"""
+Générateur de données synthétiques (lofts, transactions, profils) à l'échelle PROD
+Usage:
+  python generate-synthetic-data.py --export prod_export.json --scale lofts=10000 transactions=50000000
+  python generate-synthetic-data.py --model schema.json --seed 42 --out synthetic-data
+  psql "$DATABASE_URL" -f synthetic-data/load.sql
+
+Le modèle de schéma provient de parse_schema_data() (analyze-schema-differences.py,
+export JSON de information_schema.columns) ou de get_schema_info()
+(generate-schema-report.py, connexion directe). Seules les colonnes présentes
+dans le modèle sont générées, ce qui permet de cibler PROD comme TEST.
+
+La génération est déterministe pour une graine donnée : chaque bloc de lignes a
+son propre générateur aléatoire dérivé de (graine, table, bloc), les blocs sont
+produits en parallèle et écrits au format texte COPY, colonne par colonne.
+Les identifiants sont dérivés de (table, numéro de ligne), ce qui permet aux
+tables enfants de référencer leurs parents sans les garder en mémoire.
+"""
+
+import argparse
+import importlib.util
+import json
+import math
+import os
+import random
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_CHUNK_SIZE = 100_000
+BASE_DATE = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+# Données de référence (reprises de sql-backup/seed_data.sql et étendues)
+ZONE_AREAS = ['Alger Centre', 'Hydra', 'Bab Ezzouar', 'Oran', 'Constantine', 'Annaba',
+              'Tlemcen', 'Béjaïa', 'Sétif', 'Blida', 'Tizi Ouzou', 'Batna']
+CURRENCIES = [
+    # code, nom, symbole, défaut, ratio (1 DZD = ratio unités), poids
+    ('DZD', 'Algerian Dinar', 'DA', True, 1.0, 0.85),
+    ('EUR', 'Euro', '€', False, 0.0075, 0.10),
+    ('USD', 'US Dollar', '$', False, 0.0074, 0.05),
+]
+PAYMENT_METHODS = [('Cash', 'cash'), ('Bank Transfer', 'bank_transfer'), ('Check', 'check'), ('Credit Card', 'credit_card')]
+CATEGORIES = {
+    'income': ['Rent', 'Deposit', 'Late Fees'],
+    'expense': ['Maintenance', 'Utilities', 'Insurance', 'Taxes', 'Cleaning'],
+}
+INTERNET_CONNECTION_TYPES = [
+    ('Fiber 100', 'Fiber', '100 Mbps', 'Algerie Telecom', 2500.00),
+    ('ADSL 20', 'ADSL', '20 Mbps', 'Algerie Telecom', 1600.00),
+    ('4G Djezzy', '4G', '50 Mbps', 'Djezzy', 3000.00),
+    ('4G Ooredoo', '4G', '75 Mbps', 'Ooredoo', 3500.00),
+    ('Fiber 300', 'Fiber', '300 Mbps', 'Algerie Telecom', 5000.00),
+]
+FIRST_NAMES = ['Amine', 'Yacine', 'Sofiane', 'Karim', 'Nadia', 'Samira', 'Lina', 'Meriem',
+               'Walid', 'Rachid', 'Amel', 'Sarah', 'Mehdi', 'Imane', 'Bilal', 'Yasmine']
+LAST_NAMES = ['Benali', 'Bouzid', 'Cherif', 'Haddad', 'Khelifi', 'Mansouri', 'Saidi',
+              'Belkacem', 'Djebbar', 'Ferhat', 'Hamidi', 'Larbi', 'Meziane', 'Rahmani']
+PAYMENT_FREQUENCIES = (['mensuel', 'bimestriel', 'trimestriel', 'semestriel', 'annuel'],
+                       [0.45, 0.25, 0.20, 0.05, 0.05])
+
+# Tables générées, dans l'ordre des clés étrangères, avec leur volume par défaut.
+# Les tables de FIXED_TABLES ont le volume de leur liste de référence.
+TABLES = {
+    'auth.users': 200,
+    'public.profiles': None,  # une ligne par auth.users
+    'public.zone_areas': len(ZONE_AREAS),
+    'public.currencies': len(CURRENCIES),
+    'public.payment_methods': len(PAYMENT_METHODS),
+    'public.categories': sum(len(names) for names in CATEGORIES.values()),
+    'public.internet_connection_types': len(INTERNET_CONNECTION_TYPES),
+    'public.loft_owners': 200,
+    'public.lofts': 1_000,
+    'public.transactions': 100_000,
+}
+FIXED_TABLES = {'public.zone_areas', 'public.currencies', 'public.payment_methods',
+                'public.categories', 'public.internet_connection_types'}
+
+# Clés étrangères connues (cf. sql-backup/schema.sql) : colonne -> table parente
+FOREIGN_KEYS = {
+    'public.lofts': {'owner_id': 'public.loft_owners', 'zone_area_id': 'public.zone_areas',
+                     'internet_connection_type_id': 'public.internet_connection_types'},
+    'public.transactions': {'loft_id': 'public.lofts', 'currency_id': 'public.currencies',
+                            'payment_method_id': 'public.payment_methods', 'user_id': 'public.profiles'},
+}
+
+# profiles.id référence auth.users.id : les deux tables partagent les mêmes identifiants
+ID_NAMESPACES = {'public.profiles': 'auth.users'}
+
+def load_script(filename):
+    """Importe un script voisin dont le nom contient des tirets"""
+    path = os.path.join(SCRIPTS_DIR, filename)
+    spec = importlib.util.spec_from_file_location(filename[:-3].replace('-', '_'), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def normalize_model(schema_info):
+    """Unifie les formats parse_schema_data() et get_schema_info()
+
+    Retourne {schema.table: [{name, type, nullable, default, max_length}, ...]}
+    dans l'ordre des colonnes du modèle.
+    """
+    model = {}
+    for schema, tables in schema_info.items():
+        for table, columns in tables.items():
+            model[f"{schema}.{table}"] = [
+                {
+                    'name': name,
+                    'type': spec.get('data_type', spec.get('type')),
+                    'nullable': spec.get('is_nullable', spec.get('nullable')) == 'YES',
+                    'default': spec.get('column_default', spec.get('default')),
+                    'max_length': spec.get('character_maximum_length'),
+                }
+                for name, spec in columns.items()
+            ]
+    return model
+
+# --- Générateurs de colonnes -------------------------------------------------
+# Chaque générateur reçoit (rng, start, count, ctx) et retourne une liste de
+# `count` valeurs déjà formatées pour COPY (None = NULL). `ctx` contient les
+# valeurs partagées entre colonnes d'un même bloc (ex: devise et montant).
+
+def make_uuid(table, index, seed):
+    """UUID déterministe pour la ligne `index` d'une table"""
+    namespace = zlib.crc32(f"{seed}:{ID_NAMESPACES.get(table, table)}".encode('utf-8'))
+    return f"{namespace:08x}-{(seed >> 16) & 0xffff:04x}-4{seed & 0xfff:03x}-8000-{index:012x}"
+
+def shared(ctx, key, compute):
+    """Valeur partagée d'un bloc, calculée une seule fois"""
+    if key not in ctx:
+        ctx[key] = compute()
+    return ctx[key]
+
+def weighted_indexes(rng, weights, count):
+    """Tire `count` indices selon des poids (bissection sur les cumuls)"""
+    return rng.choices(range(len(weights)), weights=weights, k=count)
+
+def timestamps(rng, count, days_back):
+    """Horodatages uniformes sur les `days_back` jours précédant BASE_DATE"""
+    span = days_back * 86400
+    origin = BASE_DATE - timedelta(days=days_back)
+    return [(origin + timedelta(seconds=rng.randrange(span))).isoformat() for _ in range(count)]
+
+def due_dates(rng, count):
+    """Prochaines échéances dans les 90 jours suivant BASE_DATE"""
+    origin = BASE_DATE.date()
+    return [(origin + timedelta(days=rng.randrange(90))).isoformat() for _ in range(count)]
+
+def lognormal_amounts(rng, count, median, sigma):
+    """Montants log-normaux arrondis au centime"""
+    mu = math.log(median)
+    return [round(rng.lognormvariate(mu, sigma), 2) for _ in range(count)]
+
+def row_ids(table):
+    def generate(rng, start, count, ctx):
+        return [make_uuid(table, i, ctx['seed']) for i in range(start, start + count)]
+    return generate
+
+def reference_ids(parent, weights=None):
+    """Identifiants de lignes parentes tirées au hasard (uniforme ou pondéré)"""
+    def generate(rng, start, count, ctx):
+        seed = ctx['seed']
+        size = ctx['sizes'][parent]
+        if weights:
+            indexes = weighted_indexes(rng, weights[:size], count)
+        else:
+            indexes = [rng.randrange(size) for _ in range(count)]
+        return [make_uuid(parent, i, seed) for i in indexes]
+    return generate
+
+def fixed_values(values):
+    """Valeurs d'une liste de référence, indexées par numéro de ligne"""
+    def generate(rng, start, count, ctx):
+        return [values[i] for i in range(start, start + count)]
+    return generate
+
+def choice_values(values, weights=None):
+    def generate(rng, start, count, ctx):
+        return rng.choices(values, weights=weights, k=count)
+    return generate
+
+def numbered(template):
+    def generate(rng, start, count, ctx):
+        return [template.format(i=i) for i in range(start, start + count)]
+    return generate
+
+def full_names(rng, start, count, ctx):
+    return [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(count)]
+
+def created_at(rng, start, count, ctx):
+    return shared(ctx, 'created_at', lambda: timestamps(rng, count, 730))
+
+def phone_numbers(rng, start, count, ctx):
+    return [f"0{rng.choice('567')}{rng.randrange(10**8):08d}" for _ in range(count)]
+
+def zone_weights():
+    # Loi de Zipf : les premières zones (Alger) concentrent la majorité des lofts
+    return [1 / (rank + 1) for rank in range(len(ZONE_AREAS))]
+
+def company_percentages(rng, start, count, ctx):
+    return shared(ctx, 'company_percentage', lambda: rng.choices([50, 60, 70, 40, 30],
+                                                                 weights=[50, 20, 10, 15, 5], k=count))
+
+def owner_percentages(rng, start, count, ctx):
+    return [100 - value for value in company_percentages(rng, start, count, ctx)]
+
+def transaction_types(rng, start, count, ctx):
+    return shared(ctx, 'transaction_type', lambda: rng.choices(['income', 'expense'], weights=[35, 65], k=count))
+
+def currency_indexes(rng, count, ctx):
+    return shared(ctx, 'currency_index', lambda: weighted_indexes(rng, [c[5] for c in CURRENCIES], count))
+
+def amounts_dzd(rng, count, ctx):
+    def compute():
+        types = transaction_types(rng, 0, count, ctx)
+        income = iter(lognormal_amounts(rng, types.count('income'), 45_000, 0.6))
+        expense = iter(lognormal_amounts(rng, types.count('expense'), 6_000, 1.0))
+        return [next(income) if kind == 'income' else next(expense) for kind in types]
+    return shared(ctx, 'amount_dzd', compute)
+
+def transaction_amounts(rng, start, count, ctx):
+    ratios = [CURRENCIES[i][4] for i in currency_indexes(rng, count, ctx)]
+    return [round(amount * ratio, 2) for amount, ratio in zip(amounts_dzd(rng, count, ctx), ratios)]
+
+def transaction_currencies(rng, start, count, ctx):
+    return [make_uuid('public.currencies', i, ctx['seed']) for i in currency_indexes(rng, count, ctx)]
+
+def transaction_ratios(rng, start, count, ctx):
+    return [CURRENCIES[i][4] for i in currency_indexes(rng, count, ctx)]
+
+def transaction_categories(rng, start, count, ctx):
+    return [rng.choice(CATEGORIES[kind]).lower() for kind in transaction_types(rng, start, count, ctx)]
+
+def category_rows():
+    return [(name, kind) for kind, names in CATEGORIES.items() for name in names]
+
+# Règles de génération par table : colonne -> générateur.
+# Les colonnes absentes du modèle sont ignorées ; les colonnes du modèle sans
+# règle sont omises si elles ont un défaut ou acceptent NULL.
+RULES = {
+    'auth.users': {
+        'id': row_ids('auth.users'),
+        'email': numbered('user{i}@loft-test.local'),
+        'created_at': created_at,
+        'updated_at': created_at,
+    },
+    'public.profiles': {
+        'id': row_ids('public.profiles'),
+        'email': numbered('user{i}@loft-test.local'),
+        'full_name': full_names,
+        'role': choice_values(['admin', 'manager', 'member'], [2, 10, 88]),
+        'created_at': created_at,
+        'updated_at': created_at,
+    },
+    'public.zone_areas': {
+        'id': row_ids('public.zone_areas'),
+        'name': fixed_values(ZONE_AREAS),
+    },
+    'public.currencies': {
+        'id': row_ids('public.currencies'),
+        'code': fixed_values([c[0] for c in CURRENCIES]),
+        'name': fixed_values([c[1] for c in CURRENCIES]),
+        'symbol': fixed_values([c[2] for c in CURRENCIES]),
+        'is_default': fixed_values(['t' if c[3] else 'f' for c in CURRENCIES]),
+        'ratio': fixed_values([c[4] for c in CURRENCIES]),
+    },
+    'public.payment_methods': {
+        'id': row_ids('public.payment_methods'),
+        'name': fixed_values([m[0] for m in PAYMENT_METHODS]),
+        'type': fixed_values([m[1] for m in PAYMENT_METHODS]),
+    },
+    'public.categories': {
+        'id': row_ids('public.categories'),
+        'name': fixed_values([c[0] for c in category_rows()]),
+        'type': fixed_values([c[1] for c in category_rows()]),
+    },
+    'public.internet_connection_types': {
+        'id': row_ids('public.internet_connection_types'),
+        'name': fixed_values([t[0] for t in INTERNET_CONNECTION_TYPES]),
+        'type': fixed_values([t[1] for t in INTERNET_CONNECTION_TYPES]),
+        'speed': fixed_values([t[2] for t in INTERNET_CONNECTION_TYPES]),
+        'provider': fixed_values([t[3] for t in INTERNET_CONNECTION_TYPES]),
+        'status': fixed_values(['active'] * len(INTERNET_CONNECTION_TYPES)),
+        'cost': fixed_values([t[4] for t in INTERNET_CONNECTION_TYPES]),
+    },
+    'public.loft_owners': {
+        'id': row_ids('public.loft_owners'),
+        'name': full_names,
+        'email': numbered('owner{i}@loft-test.local'),
+        'phone': phone_numbers,
+        'ownership_type': choice_values(['company', 'third_party'], [20, 80]),
+        'created_at': created_at,
+        'updated_at': created_at,
+    },
+    'public.lofts': {
+        'id': row_ids('public.lofts'),
+        'name': numbered('Loft {i}'),
+        'address': numbered('{i} Rue Didouche Mourad'),
+        'price_per_month': lambda rng, start, count, ctx: lognormal_amounts(rng, count, 60_000, 0.4),
+        'price_per_night': lambda rng, start, count, ctx: lognormal_amounts(rng, count, 8_000, 0.35),
+        'status': choice_values(['available', 'occupied', 'maintenance'], [55, 35, 10]),
+        'owner_id': reference_ids('public.loft_owners'),
+        'company_percentage': company_percentages,
+        'owner_percentage': owner_percentages,
+        'zone_area_id': reference_ids('public.zone_areas', zone_weights()),
+        'internet_connection_type_id': reference_ids('public.internet_connection_types'),
+        'phone_number': phone_numbers,
+        **{f'frequence_paiement_{utility}': choice_values(*PAYMENT_FREQUENCIES)
+           for utility in ('eau', 'energie', 'telephone', 'internet', 'tv')},
+        **{f'prochaine_echeance_{utility}': lambda rng, start, count, ctx: due_dates(rng, count)
+           for utility in ('eau', 'energie', 'telephone', 'internet', 'tv')},
+        'created_at': created_at,
+        'updated_at': created_at,
+    },
+    'public.transactions': {
+        'id': row_ids('public.transactions'),
+        'amount': transaction_amounts,
+        'transaction_type': transaction_types,
+        'status': choice_values(['completed', 'pending', 'failed'], [80, 15, 5]),
+        'date': lambda rng, start, count, ctx: timestamps(rng, count, 730),
+        'category': transaction_categories,
+        'loft_id': reference_ids('public.lofts'),
+        'currency_id': transaction_currencies,
+        'payment_method_id': reference_ids('public.payment_methods', [60, 30, 8, 2]),
+        'user_id': reference_ids('public.profiles'),
+        'ratio_at_transaction': transaction_ratios,
+        'equivalent_amount_default_currency': lambda rng, start, count, ctx: amounts_dzd(rng, count, ctx),
+        'created_at': created_at,
+        'updated_at': created_at,
+    },
+}
+
+def fallback_generator(column):
+    """Générateur générique par type pour une colonne NOT NULL sans règle ni défaut"""
+    data_type = (column['type'] or '').lower()
+    name = column['name']
+    if data_type == 'uuid':
+        return lambda rng, start, count, ctx: [make_uuid(name, i, ctx['seed']) for i in range(start, start + count)]
+    if data_type in ('integer', 'bigint', 'smallint'):
+        return lambda rng, start, count, ctx: [rng.randrange(1000) for _ in range(count)]
+    if data_type in ('numeric', 'double precision', 'real'):
+        return lambda rng, start, count, ctx: [round(rng.uniform(0, 1000), 2) for _ in range(count)]
+    if data_type == 'boolean':
+        return lambda rng, start, count, ctx: rng.choices(['t', 'f'], k=count)
+    if data_type == 'date':
+        return lambda rng, start, count, ctx: due_dates(rng, count)
+    if data_type.startswith('timestamp'):
+        return lambda rng, start, count, ctx: timestamps(rng, count, 365)
+    if data_type in ('json', 'jsonb'):
+        return lambda rng, start, count, ctx: ['{}'] * count
+    if data_type in ('text', 'character varying', 'character'):
+        limit = column['max_length'] or 255
+        return lambda rng, start, count, ctx: [f"{name}-{i}"[:limit] for i in range(start, start + count)]
+    raise ValueError(f"Aucun générateur pour {name} ({column['type']})")
+
+def plan_tables(model, scales):
+    """Détermine les tables à générer, leurs colonnes et leurs volumes
+
+    Retourne [(table, [colonnes], nombre_de_lignes), ...] dans l'ordre des clés étrangères.
+    """
+    sizes = {}
+    plan = []
+    for table, default_size in TABLES.items():
+        if table not in model:
+            continue
+        if table == 'public.profiles':
+            size = sizes.get('auth.users', scales.get('auth.users', TABLES['auth.users']))
+        elif table in FIXED_TABLES:
+            size = default_size
+        else:
+            size = scales.get(table, default_size)
+
+        columns = []
+        for column in model[table]:
+            name = column['name']
+            parent = FOREIGN_KEYS.get(table, {}).get(name)
+            if parent and parent not in sizes:
+                # Parent non généré : on ne peut référencer aucune ligne existante
+                if column['nullable']:
+                    continue
+                raise ValueError(f"{table}.{name} référence {parent}, absent du modèle")
+            if name in RULES[table]:
+                columns.append(name)
+            elif column['default'] is None and not column['nullable']:
+                fallback_generator(column)  # échoue tôt si le type n'est pas géré
+                columns.append(name)
+        sizes[table] = size
+        plan.append((table, columns, size))
+    return plan, sizes
+
+def copy_escape(value):
+    """Formate une valeur pour le format texte de COPY"""
+    if value is None:
+        return '\\N'
+    if not isinstance(value, str):
+        return str(value)
+    return value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+def generate_chunk(model_columns, table, columns, start, count, chunk_index, seed, sizes, out_dir):
+    """Génère un bloc de lignes et l'écrit dans son propre fichier COPY"""
+    rng = random.Random(f"{seed}:{table}:{chunk_index}")
+    ctx = {'seed': seed, 'sizes': sizes}
+    rules = RULES[table]
+    by_name = {column['name']: column for column in model_columns}
+
+    values = []
+    for name in columns:
+        generator = rules.get(name) or fallback_generator(by_name[name])
+        values.append([copy_escape(value) for value in generator(rng, start, count, ctx)])
+
+    path = os.path.join(out_dir, table, part_name(chunk_index))
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        f.write(''.join('\t'.join(row) + '\n' for row in zip(*values)))
+    return count
+
+def part_name(chunk_index):
+    return f"part-{chunk_index:05d}.copy"
+
+def clear_parts(table_dir):
+    """Supprime les blocs d'une génération précédente (autre volume ou autre graine)"""
+    for name in os.listdir(table_dir):
+        if name.startswith('part-') and name.endswith('.copy'):
+            os.remove(os.path.join(table_dir, name))
+
+def write_load_script(out_dir, plan, chunk_size):
+    """Écrit load.sql : un \\copy par bloc du plan, dans l'ordre des clés étrangères"""
+    lines = ["-- Chargement des données synthétiques (psql -f load.sql)", "BEGIN;"]
+    for table, columns, size in plan:
+        column_list = ', '.join(f'"{name}"' for name in columns)
+        table_dir = os.path.abspath(os.path.join(out_dir, table))
+        for chunk_index, _ in enumerate(range(0, size, chunk_size)):
+            # Chemins absolus : \\copy résout les chemins relatifs depuis le répertoire de psql
+            path = os.path.join(table_dir, part_name(chunk_index)).replace('\\', '/')
+            lines.append(f"\\copy {table} ({column_list}) FROM '{path}'")
+    lines.append("COMMIT;")
+    with open(os.path.join(out_dir, 'load.sql'), 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+
+def generate(model, scales, out_dir, seed=0, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Génère toutes les tables du plan en parallèle ; retourne le plan exécuté"""
+    plan, sizes = plan_tables(model, scales)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for table, columns, size in plan:
+            table_dir = os.path.join(out_dir, table)
+            os.makedirs(table_dir, exist_ok=True)
+            clear_parts(table_dir)
+            for chunk_index, start in enumerate(range(0, size, chunk_size)):
+                count = min(chunk_size, size - start)
+                future = executor.submit(generate_chunk, model[table], table, columns, start, count,
+                                         chunk_index, seed, sizes, out_dir)
+                futures[future] = table
+
+        generated = {}
+        for future in as_completed(futures):
+            table = futures[future]
+            generated[table] = generated.get(table, 0) + future.result()
+
+    write_load_script(out_dir, plan, chunk_size)
+    return plan, generated
+
+def resolve_table(name):
+    """Nom complet d'une table de TABLES (schema.table ou nom nu, ex: users -> auth.users)"""
+    if '.' in name:
+        matches = [name] if name in TABLES else []
+    else:
+        matches = [table for table in TABLES if table.split('.', 1)[1] == name]
+    if not matches:
+        raise ValueError(f"Table inconnue pour --scale: {name} (tables générées: {', '.join(TABLES)})")
+    if len(matches) > 1:
+        raise ValueError(f"Table ambiguë pour --scale: {name} ({', '.join(matches)})")
+    return matches[0]
+
+def parse_scales(values):
+    """Parse les arguments --scale au format table=lignes
+
+    Seules les tables à volume libre de TABLES sont acceptées : les tables de
+    référence ont un volume fixe et profiles suit auth.users. Une table parente
+    ne peut être vide que si ses tables enfants le sont aussi.
+    """
+    scales = {}
+    for value in values or []:
+        name, sep, count = value.partition('=')
+        if not sep:
+            raise ValueError(f"Volume invalide (attendu table=lignes): {value}")
+        table = resolve_table(name.strip())
+        if table in FIXED_TABLES:
+            raise ValueError(f"{table} a un volume fixe ({TABLES[table]} lignes)")
+        if table in ID_NAMESPACES:
+            raise ValueError(f"{table} a une ligne par {ID_NAMESPACES[table]} : utilisez --scale {ID_NAMESPACES[table]}=N")
+        try:
+            scales[table] = int(count.replace('_', ''))
+        except ValueError:
+            raise ValueError(f"Volume invalide pour {table}: {count}") from None
+        if scales[table] < 0:
+            raise ValueError(f"Volume négatif pour {table}: {count}")
+
+    def size(table):
+        return size(ID_NAMESPACES[table]) if table in ID_NAMESPACES else scales.get(table, TABLES[table])
+
+    for table, references in FOREIGN_KEYS.items():
+        for parent in references.values():
+            if size(parent) == 0 and size(table) > 0:
+                raise ValueError(f"{ID_NAMESPACES.get(parent, parent)} ne peut pas être vide : "
+                                 f"{table} référence {parent}")
+    return scales
+
+def load_model(args):
+    """Construit le modèle de schéma depuis un export JSON, un modèle JSON ou une base"""
+    if args.export:
+        with open(args.export, 'r', encoding='utf-8') as f:
+            return normalize_model(load_script('analyze-schema-differences.py').parse_schema_data(json.load(f)))
+    if args.model:
+        with open(args.model, 'r', encoding='utf-8') as f:
+            return normalize_model(json.load(f))
+    schema_info = load_script('generate-schema-report.py').get_schema_info(args.dsn, "SOURCE")
+    if schema_info is None:
+        raise SystemExit(1)
+    return normalize_model(schema_info)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Génération de données synthétiques au format COPY")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--export', help="Export JSON de information_schema.columns (parse_schema_data)")
+    source.add_argument('--model', help="Modèle JSON au format get_schema_info/parse_schema_data")
+    source.add_argument('--dsn', help="Base à introspecter avec get_schema_info")
+    parser.add_argument('--scale', nargs='+', help="Volumes, ex: lofts=10000 transactions=50000000")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='synthetic-data')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    if args.dsn:
+        # get_schema_info attend un dictionnaire de connexion psycopg2
+        args.dsn = {'dsn': args.dsn}
+
+    print("=" * 60)
+    print("GÉNÉRATION DE DONNÉES SYNTHÉTIQUES")
+    print("=" * 60)
+
+    try:
+        scales = parse_scales(args.scale)
+    except ValueError as e:
+        parser.error(str(e))
+
+    model = load_model(args)
+    started = time.time()
+    plan, generated = generate(model, scales, args.out, args.seed, args.workers, args.chunk_size)
+
+    print(f"\n📊 TABLES GÉNÉRÉES (graine {args.seed}):")
+    for table, columns, _ in plan:
+        print(f"  - {table.ljust(40)}{str(generated.get(table, 0)).rjust(12)} lignes, {len(columns)} colonnes")
+    print(f"\n✅ {sum(generated.values())} lignes en {time.time() - started:.1f}s")
+    print(f"Chargement: psql \"$DATABASE_URL\" -f {os.path.join(args.out, 'load.sql')}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
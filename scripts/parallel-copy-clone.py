@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+"""
+Copie parallèle des données PROD -> TEST via COPY binaire
+Usage: python parallel-copy-clone.py [--tables public.lofts --with-dependents] [--where "public.lofts=status = 'available'"]
+
+Chaque table est transférée en flux direct :
+COPY (SELECT ...) TO STDOUT (FORMAT binary) sur la source
+-> COPY ... FROM STDIN (FORMAT binary) sur la cible, sans fichier intermédiaire.
+Une table dont une colonne n'a pas le même type des deux côtés passe par le
+format texte, que la cible convertit.
+Les tables sont ordonnancées selon les clés étrangères : une table ne démarre
+que lorsque toutes les tables qu'elle référence sont copiées, et les tables
+indépendantes sont copiées en parallèle.
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import psycopg2
+from psycopg2 import sql
+
+# Configuration des connexions (à adapter selon votre environnement)
+PROD_CONFIG = {
+    'host': 'prod-db-host',
+    'database': 'your_prod_db',
+    'user': 'your_user',
+    'password': 'your_password'
+}
+
+TEST_CONFIG = {
+    'host': 'test-db-host',
+    'database': 'your_test_db',
+    'user': 'your_user',
+    'password': 'your_password'
+}
+
+# Schémas copiés par défaut (les schémas système Supabase sont exclus)
+DEFAULT_SCHEMAS = ['public', 'auth']
+
+def connect(config):
+    """Ouvre une connexion à partir d'un dictionnaire de config ou d'un DSN"""
+    if isinstance(config, str):
+        return psycopg2.connect(config)
+    return psycopg2.connect(**config)
+
+def get_tables(config, schemas):
+    """Liste les tables de base des schémas donnés, au format schema.table"""
+    conn = connect(config)
+    try:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT table_schema, table_name
+            FROM information_schema.tables
+            WHERE table_type = 'BASE TABLE' AND table_schema = ANY(%s)
+            ORDER BY table_schema, table_name;
+        """, (list(schemas),))
+        return [f"{schema}.{table}" for schema, table in cur.fetchall()]
+    finally:
+        conn.close()
+
+def get_columns(config, tables):
+    """Récupère les colonnes copiables (hors colonnes générées) et leur type, par table
+
+    Retourne {schema.table: {colonne: type}} dans l'ordre physique des colonnes ;
+    le type est udt_name (int4, varchar, _text, type énuméré...), seul à
+    distinguer les tableaux et les types utilisateur.
+    """
+    conn = connect(config)
+    try:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT table_schema, table_name, column_name, udt_schema || '.' || udt_name
+            FROM information_schema.columns
+            WHERE table_schema || '.' || table_name = ANY(%s)
+              AND is_generated = 'NEVER'
+            ORDER BY table_schema, table_name, ordinal_position;
+        """, (list(tables),))
+        columns = defaultdict(dict)
+        for schema, table, column, data_type in cur.fetchall():
+            columns[f"{schema}.{table}"][column] = data_type
+        return columns
+    finally:
+        conn.close()
+
+def get_foreign_keys(config, schemas):
+    """Récupère les clés étrangères entre tables des schémas donnés"""
+    conn = connect(config)
+    try:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT
+                src_ns.nspname || '.' || src.relname,
+                ref_ns.nspname || '.' || ref.relname,
+                ARRAY(SELECT attname FROM unnest(con.conkey) WITH ORDINALITY k(num, ord)
+                      JOIN pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = k.num
+                      ORDER BY k.ord)::text[],
+                ARRAY(SELECT attname FROM unnest(con.confkey) WITH ORDINALITY k(num, ord)
+                      JOIN pg_attribute a ON a.attrelid = con.confrelid AND a.attnum = k.num
+                      ORDER BY k.ord)::text[]
+            FROM pg_constraint con
+            JOIN pg_class src ON src.oid = con.conrelid
+            JOIN pg_namespace src_ns ON src_ns.oid = src.relnamespace
+            JOIN pg_class ref ON ref.oid = con.confrelid
+            JOIN pg_namespace ref_ns ON ref_ns.oid = ref.relnamespace
+            WHERE con.contype = 'f' AND src_ns.nspname = ANY(%s);
+        """, (list(schemas),))
+        return [
+            {'table': table, 'columns': list(cols), 'ref_table': ref_table, 'ref_columns': list(ref_cols)}
+            for table, ref_table, cols, ref_cols in cur.fetchall()
+        ]
+    finally:
+        conn.close()
+
+def build_dependencies(tables, foreign_keys):
+    """Construit le graphe table -> tables référencées (auto-références ignorées)"""
+    table_set = set(tables)
+    dependencies = {table: set() for table in tables}
+    for fk in foreign_keys:
+        if fk['table'] in table_set and fk['ref_table'] in table_set and fk['table'] != fk['ref_table']:
+            dependencies[fk['table']].add(fk['ref_table'])
+    return dependencies
+
+def restrict_dependencies(dependencies, tables):
+    """Restreint le graphe aux tables réellement copiées
+
+    Une table écartée (absente de la cible, sans colonne commune) ne sera jamais
+    copiée : elle ne doit bloquer aucune autre table.
+    """
+    kept = set(tables)
+    return {table: dependencies[table] & kept for table in tables}
+
+def select_tables(tables, foreign_keys, roots, with_dependents=False):
+    """Restreint la copie aux tables racines, et optionnellement à leurs dépendants"""
+    unknown = [root for root in roots if root not in tables]
+    if unknown:
+        raise ValueError(f"Tables inconnues: {', '.join(unknown)}")
+
+    selected = set(roots)
+    if with_dependents:
+        children = defaultdict(set)
+        for fk in foreign_keys:
+            children[fk['ref_table']].add(fk['table'])
+        stack = list(roots)
+        while stack:
+            for child in children[stack.pop()]:
+                if child in tables and child not in selected:
+                    selected.add(child)
+                    stack.append(child)
+    return [table for table in tables if table in selected]
+
+def topological_order(dependencies):
+    """Ordre topologique (Kahn) ; les cycles éventuels sont placés à la fin"""
+    remaining = {table: set(deps) for table, deps in dependencies.items()}
+    order = []
+    while remaining:
+        ready = sorted(table for table, deps in remaining.items() if not deps)
+        if not ready:
+            # Cycle de clés étrangères : on ne peut pas mieux faire que l'ordre alphabétique
+            cycle = sorted(remaining)
+            print(f"⚠️  Cycle de clés étrangères détecté: {', '.join(cycle)}")
+            order.extend(cycle)
+            break
+        for table in ready:
+            order.append(table)
+            del remaining[table]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return order
+
+def qualified(table):
+    """Identifiant SQL échappé pour schema.table"""
+    schema, name = table.split('.', 1)
+    return sql.Identifier(schema, name)
+
+def build_row_filters(order, foreign_keys, filters):
+    """Propage les filtres de lignes aux tables enfants via leurs clés étrangères
+
+    Une table qui référence une table filtrée ne garde que les lignes dont la
+    clé étrangère pointe vers une ligne copiée (ou est NULL), ce qui garantit
+    la cohérence référentielle de la cible.
+    """
+    row_filters = {table: [sql.SQL('({})').format(sql.SQL(clause))] for table, clause in filters.items()}
+    selected = set(order)
+    for table in order:
+        for fk in foreign_keys:
+            parent = fk['ref_table']
+            if fk['table'] != table or parent == table or parent not in selected or parent not in row_filters:
+                continue
+            columns = sql.SQL(', ').join(sql.Identifier(col) for col in fk['columns'])
+            ref_columns = sql.SQL(', ').join(sql.Identifier(col) for col in fk['ref_columns'])
+            null_check = sql.SQL(' OR ').join(
+                sql.SQL('{} IS NULL').format(sql.Identifier(col)) for col in fk['columns']
+            )
+            row_filters.setdefault(table, []).append(sql.SQL('({} OR ({}) IN (SELECT {} FROM {} WHERE {}))').format(
+                null_check, columns, ref_columns, qualified(parent),
+                sql.SQL(' AND ').join(row_filters[parent])
+            ))
+    return row_filters
+
+def match_columns(source_columns, target_columns):
+    """Colonnes communes aux deux côtés, dans l'ordre de la source
+
+    Retourne (colonnes, colonnes absentes de la cible, colonnes de type différent).
+    Le format binaire exige des types identiques : une table qui a des colonnes
+    de type différent doit être copiée en format texte.
+    """
+    columns = [col for col in source_columns if col in target_columns]
+    missing = [col for col in source_columns if col not in target_columns]
+    mismatched = [col for col in columns if source_columns[col] != target_columns[col]]
+    return columns, missing, mismatched
+
+def copy_error(source_error, target_error):
+    """Choisit l'erreur à remonter quand la copie a échoué
+
+    Une erreur source coupe le flux et provoque un "unexpected EOF" côté cible :
+    la cause est alors l'erreur source. À l'inverse, si la cible échoue sans lire
+    le pipe (droits, colonne inconnue), la fermeture du pipe fait échouer le
+    producteur avec BrokenPipeError : la cause est l'erreur cible.
+    """
+    if target_error and (source_error is None or isinstance(source_error, OSError)):
+        return target_error
+    return source_error or target_error
+
+def copy_table(source_config, target_config, table, columns, row_filter=None, binary=True):
+    """Transfère une table en flux COPY de la source vers la cible
+
+    La lecture source et l'écriture cible tournent en parallèle de part et
+    d'autre d'un pipe OS ; la transaction cible n'est validée que si les deux
+    côtés ont réussi. binary=False passe par le format texte, que la cible
+    convertit vers ses propres types.
+    """
+    copy_format = sql.SQL('binary' if binary else 'text')
+    column_list = sql.SQL(', ').join(sql.Identifier(col) for col in columns)
+    select = sql.SQL('SELECT {} FROM {}').format(column_list, qualified(table))
+    if row_filter:
+        select = sql.SQL('{} WHERE {}').format(select, sql.SQL(' AND ').join(row_filter))
+    copy_out = sql.SQL('COPY ({}) TO STDOUT (FORMAT {})').format(select, copy_format)
+    copy_in = sql.SQL('COPY {} ({}) FROM STDIN (FORMAT {})').format(qualified(table), column_list, copy_format)
+
+    source = connect(source_config)
+    target = connect(target_config)
+    read_fd, write_fd = os.pipe()
+    reader = os.fdopen(read_fd, 'rb')
+    writer = os.fdopen(write_fd, 'wb')
+    errors = []
+
+    def produce():
+        try:
+            source.cursor().copy_expert(copy_out.as_string(source), writer)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            try:
+                writer.close()
+            except OSError:
+                pass
+
+    producer = threading.Thread(target=produce, name=f"copy-out-{table}", daemon=True)
+    try:
+        producer.start()
+        cur = target.cursor()
+        target_error = None
+        try:
+            cur.copy_expert(copy_in.as_string(target), reader)
+        except Exception as e:
+            target_error = e
+        finally:
+            # Débloque le producteur si la cible a échoué en cours de route
+            reader.close()
+            producer.join()
+        error = copy_error(errors[0] if errors else None, target_error)
+        if error:
+            raise error
+        rows = cur.rowcount
+        target.commit()
+        return rows
+    except Exception:
+        target.rollback()
+        raise
+    finally:
+        source.close()
+        target.close()
+
+def referencing_tables(tables, foreign_keys):
+    """Tables hors de la sélection qui référencent une table de la sélection"""
+    selected = set(tables)
+    return sorted({fk['table'] for fk in foreign_keys
+                   if fk['ref_table'] in selected and fk['table'] not in selected})
+
+def truncate_tables(target_config, tables, cascade=False):
+    """Vide les tables cibles en une seule instruction
+
+    Sans CASCADE, PostgreSQL refuse si une table hors de la liste référence une
+    table de la liste ; avec CASCADE, ces tables sont vidées elles aussi.
+    """
+    conn = connect(target_config)
+    try:
+        cur = conn.cursor()
+        statement = sql.SQL('TRUNCATE {}').format(sql.SQL(', ').join(qualified(t) for t in tables))
+        if cascade:
+            statement = sql.SQL('{} CASCADE').format(statement)
+        cur.execute(statement)
+        conn.commit()
+    finally:
+        conn.close()
+
+def run_copy(source_config, target_config, order, dependencies, columns, row_filters, workers=4, text_tables=()):
+    """Exécute les copies avec un pool de workers en respectant les dépendances FK
+
+    Les tables de text_tables sont copiées en format texte plutôt que binaire.
+    """
+    pending = {table: set(dependencies[table]) for table in order}
+    results = {}
+    failed = set()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        running = {}
+        while pending or running:
+            for table in [t for t in order if t in pending and not pending[t]]:
+                del pending[table]
+                running[executor.submit(
+                    copy_table, source_config, target_config, table, columns[table], row_filters.get(table),
+                    table not in text_tables
+                )] = (table, time.time())
+
+            if not running:
+                if not pending:
+                    break
+                # Cycle de clés étrangères : on débloque la première table restante
+                table = next(t for t in order if t in pending)
+                print(f"⚠️  {table}: démarrée malgré un cycle de dépendances")
+                pending[table].clear()
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                table, started = running.pop(future)
+                try:
+                    rows = future.result()
+                    results[table] = rows
+                    print(f"✅ {table}: {rows} lignes en {time.time() - started:.1f}s")
+                    for deps in pending.values():
+                        deps.discard(table)
+                except Exception as e:
+                    failed.add(table)
+                    print(f"❌ {table}: {e}")
+
+            # Les dépendants d'une table en échec ne seront jamais débloqués
+            blocked = [t for t in order if t in pending and pending[t] & failed]
+            while blocked:
+                for table in blocked:
+                    del pending[table]
+                    failed.add(table)
+                    print(f"⏭️  {table}: ignorée (dépendance en échec)")
+                blocked = [t for t in order if t in pending and pending[t] & failed]
+
+    return results, failed
+
+def parse_filters(values):
+    """Parse les arguments --where au format schema.table=condition"""
+    filters = {}
+    for value in values or []:
+        table, sep, clause = value.partition('=')
+        if not sep or not clause.strip():
+            raise ValueError(f"Filtre invalide (attendu schema.table=condition): {value}")
+        filters[table.strip()] = clause.strip()
+    return filters
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Copie parallèle PROD -> TEST via COPY binaire")
+    parser.add_argument('--source-dsn', help="DSN source (sinon PROD_CONFIG)")
+    parser.add_argument('--target-dsn', help="DSN cible (sinon TEST_CONFIG)")
+    parser.add_argument('--schemas', nargs='+', default=DEFAULT_SCHEMAS)
+    parser.add_argument('--tables', nargs='+', help="Tables racines à copier (schema.table)")
+    parser.add_argument('--with-dependents', action='store_true',
+                        help="Ajoute les tables qui référencent les tables racines")
+    parser.add_argument('--where', action='append', help="Filtre de lignes: schema.table=condition")
+    parser.add_argument('--truncate', action='store_true', help="Vide les tables cibles avant la copie")
+    parser.add_argument('--cascade', action='store_true',
+                        help="Avec --truncate : vide aussi les tables qui référencent les tables copiées")
+    parser.add_argument('--yes', action='store_true', help="Ne demande pas de confirmation pour --cascade")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--dry-run', action='store_true', help="Affiche le plan sans copier")
+    args = parser.parse_args(argv)
+    if args.cascade and not args.truncate:
+        parser.error("--cascade n'a de sens qu'avec --truncate")
+
+    source_config = args.source_dsn or PROD_CONFIG
+    target_config = args.target_dsn or TEST_CONFIG
+
+    print("=" * 60)
+    print("COPIE PARALLÈLE PROD -> TEST (COPY binaire)")
+    print("=" * 60)
+
+    tables = get_tables(source_config, args.schemas)
+    foreign_keys = get_foreign_keys(source_config, args.schemas)
+    try:
+        if args.tables:
+            tables = select_tables(tables, foreign_keys, args.tables, args.with_dependents)
+        filters = parse_filters(args.where)
+    except ValueError as e:
+        parser.error(str(e))
+    unknown = [table for table in filters if table not in tables]
+    if unknown:
+        parser.error(f"Filtre sur des tables non copiées: {', '.join(unknown)}")
+
+    dependencies = build_dependencies(tables, foreign_keys)
+    order = topological_order(dependencies)
+    row_filters = build_row_filters(order, foreign_keys, filters)
+
+    # Seules les colonnes présentes des deux côtés sont copiées, dans le même ordre
+    # (l'ordre physique des colonnes diffère entre PROD et TEST, ex: lofts)
+    source_columns = get_columns(source_config, order)
+    target_columns = get_columns(target_config, order)
+    columns = {}
+    text_tables = set()
+    for table in order:
+        target_types = target_columns.get(table, {})
+        columns[table], missing, mismatched = match_columns(source_columns[table], target_types)
+        if not target_types:
+            print(f"⚠️  {table}: absente de la cible")
+            continue
+        if missing:
+            print(f"⚠️  {table}: colonnes ignorées (absentes de la cible): {', '.join(missing)}")
+        if mismatched:
+            # Le format binaire échouerait ("incorrect binary data format") : la cible convertit le texte
+            text_tables.add(table)
+            details = ', '.join(f"{col} ({source_columns[table][col]} -> {target_types[col]})" for col in mismatched)
+            print(f"⚠️  {table}: types différents, copie en format texte: {details}")
+    order = [table for table in order if columns[table]]
+    dependencies = restrict_dependencies(dependencies, order)
+
+    outside = referencing_tables(order, foreign_keys) if args.truncate else []
+    if outside and not args.cascade:
+        parser.error("--truncate impossible : ces tables référencent les tables copiées "
+                     f"({', '.join(outside)}). Ajoutez-les à --tables ou utilisez --cascade.")
+
+    print(f"\n📋 PLAN ({len(order)} tables, {args.workers} workers):")
+    for table in order:
+        deps = sorted(dependencies[table])
+        suffix = f" (après {', '.join(deps)})" if deps else ""
+        marker = " [filtrée]" if table in row_filters else ""
+        marker += " [texte]" if table in text_tables else ""
+        print(f"  - {table}{marker}{suffix}")
+
+    if args.dry_run:
+        return 0
+
+    if args.truncate:
+        if outside:
+            print(f"\n⚠️  TRUNCATE CASCADE videra aussi: {', '.join(outside)}")
+            if not args.yes:
+                answer = input("Voulez-vous continuer? (y/N): ")
+                if answer.strip().lower() not in ('y', 'yes'):
+                    print("❌ Copie annulée")
+                    return 1
+        print("\n🧹 Vidage des tables cibles...")
+        truncate_tables(target_config, order, cascade=args.cascade)
+
+    print("\n🚀 COPIE:")
+    started = time.time()
+    results, failed = run_copy(source_config, target_config, order, dependencies, columns, row_filters,
+                               args.workers, text_tables)
+
+    print(f"\n📈 RÉSUMÉ:")
+    print(f"  - Tables copiées: {len(results)}")
+    print(f"  - Lignes copiées: {sum(results.values())}")
+    print(f"  - Tables en échec: {len(failed)}")
+    print(f"  - Durée totale: {time.time() - started:.1f}s")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,92 +1,181 @@
 #!/usr/bin/env python3
 """
 Analyse rapide avec vos données déjà intégrées
+
+Utilisable aussi comme bibliothèque : get_catalog_stats() agrège en une seule
+passe un flux d'enregistrements information_schema.columns (nombre de tables
+par schéma, ensemble des tables, colonnes de chaque table) et mémorise le
+résultat sous une clé fournie par l'appelant (load_catalog() utilise le chemin,
+la taille et la date de l'export). Les résultats sont en lecture seule ;
+catalog_to_json() en donne une copie sérialisable. L'import du module n'exécute
+plus l'analyse.
 """
 
 import json
-from collections import defaultdict
+import os
+from collections import OrderedDict, defaultdict
+from types import MappingProxyType
 
 # Vos données réelles (intégrées directement)
 prod_data = [{"table_schema": "auth","table_name": "audit_log_entries","column_name": "instance_id","data_type": "uuid","is_nullable": "YES","column_default": None,"character_maximum_length": None},{"table_schema": "auth","table_name": "audit_log_entries","column_name": "id","data_type": "uuid","is_nullable": "NO","column_default": None,"character_maximum_length": None},{"table_schema": "auth","table_name": "audit_log_entries","column_name": "payload","data_type": "json","is_nullable": "YES","column_default": None,"character_maximum_length": None},{"table_schema": "auth","table_name": "audit_log_entries","column_name": "created_at","data_type": "timestamp with time zone","is_nullable": "YES","column_default": None,"character_maximum_length": None},{"table_schema": "auth","table_name": "audit_log_entries","column_name": "ip_address","data_type": "character varying","is_nullable": "NO","column_default": "''::character varying","character_maximum_length": 64},{"table_schema": "auth","table_name": "flow_state","column_name": "id","data_type": "uuid","is_nullable": "NO","column_default": None,"character_maximum_length": None},{"table_schema": "auth","table_name": "flow_state","column_name": "user_id","data_type": "uuid","is_nullable": "YES","column_default": None,"character_maximum_length": None},{"table_schema": "auth","table_name": "flow_state","column_name": "auth_code","data_type": "text","is_nullable": "NO","column_default": None,"character_maximum_length": None},{"table_schema": "auth","table_name": "flow_state","column_name": "code_challenge_method","data_type": "USER-DEFINED","is_nullable": "NO","column_default": None,"character_maximum_length": None},{"table_schema": "auth","table_name": "flow_state","column_name": "code_challenge","data_type": "text","is_nullable": "NO","column_default": None,"character_maximum_length": None},{"table_schema": "auth","table_name": "flow_state","column_name": "provider_type","data_type": "text","is_nullable": "NO","column_default": None,"character_maximum_length": None},{"table_schema": "auth","table_name": "flow_state","column_name": "provider_access_token","data_type": "text","is_nullable": "YES","column_default": None,"character_maximum_length": None},{"table_schema": "auth","table_name": "flow_state","column_name": "provider_refresh_token","data_type": "text","is_nullable": "YES","column_default": None,"character_maximum_length": None},{"table_schema": "auth","table_name": "flow_state","column_name": "created_at","data_type": "timestamp with time zone","is_nullable": "YES","column_default": None,"character_maximum_length": None},{"table_schema": "auth","table_name": "flow_state","column_name": "updated_at","data_type": "timestamp with time zone","is_nullable": "YES","column_default": None,"character_maximum_length": None},{"table_schema": "auth","table_name": "flow_state","column_name": "authentication_method","data_type": "text","is_nullable": "NO","column_default": None,"character_maximum_length": None},{"table_schema": "auth","table_name": "flow_state","column_name": "auth_code_issued_at","data_type": "timestamp with time zone","is_nullable": "YES","column_default": None,"character_maximum_length": None}]
 
 test_data = [{"table_schema": "auth","table_name": "audit_log_entries","column_name": "instance_id","data_type": "uuid","is_nullable": "YES","column_default": None,"character_maximum_length": None},{"table_schema": "auth","table_name": "audit_log_entries","column_name": "id","data_type": "uuid","is_nullable": "NO","column_default": None,"character_maximum_length": None},{"table_schema": "auth","table_name": "audit_log_entries","column_name": "payload","data_type": "json","is_nullable": "YES","column_default": None,"character_maximum_length": None},{"table_schema": "auth","table_name": "audit_log_entries","column_name": "created_at","data_type": "timestamp with time zone","is_nullable": "YES","column_default": None,"character_maximum_length": None},{"table_schema": "auth","table_name": "audit_log_entries","column_name": "ip_address","data_type": "character varying","is_nullable": "NO","column_default": "''::character varying","character_maximum_length": 64}]
 
-def count_tables_by_schema(data):
-    """Compte les tables par schéma"""
-    schema_counts = defaultdict(set)
-    for item in data:
-        schema_counts[item['table_schema']].add(item['table_name'])
-    
-    return {schema: len(tables) for schema, tables in schema_counts.items()}
-
-def get_unique_tables(data):
-    """Récupère la liste unique des tables"""
-    tables = set()
-    for item in data:
-        tables.add(f"{item['table_schema']}.{item['table_name']}")
-    return sorted(tables)
-
-def analyze_lofts_table(data):
-    """Analyse spécifique de la table lofts"""
-    lofts_columns = []
-    for item in data:
-        if item['table_name'] == 'lofts' and item['table_schema'] == 'public':
-            lofts_columns.append(item['column_name'])
-    return sorted(lofts_columns)
-
-# Analyse rapide
-print("=" * 60)
-print("ANALYSE RAPIDE DES SCHÉMAS")
-print("=" * 60)
-
-# Compter les tables
-prod_counts = count_tables_by_schema(prod_data)
-test_counts = count_tables_by_schema(test_data)
-
-print("\n📊 NOMBRE DE TABLES PAR SCHÉMA:")
-print("SCHÉMA".ljust(20) + "PROD".ljust(10) + "TEST".ljust(10) + "DIFFÉRENCE")
-print("-" * 50)
-
-all_schemas = set(list(prod_counts.keys()) + list(test_counts.keys()))
-for schema in sorted(all_schemas):
-    prod_count = prod_counts.get(schema, 0)
-    test_count = test_counts.get(schema, 0)
-    diff = prod_count - test_count
-    diff_str = f"+{diff}" if diff > 0 else str(diff) if diff < 0 else "="
-    print(f"{schema.ljust(20)}{str(prod_count).ljust(10)}{str(test_count).ljust(10)}{diff_str}")
-
-# Tables uniques
-prod_tables = get_unique_tables(prod_data)
-test_tables = get_unique_tables(test_data)
-
-missing_in_test = set(prod_tables) - set(test_tables)
-missing_in_prod = set(test_tables) - set(prod_tables)
-
-print(f"\n🚨 TABLES MANQUANTES DANS TEST ({len(missing_in_test)}):")
-for table in sorted(missing_in_test):
-    print(f"  - {table}")
-
-print(f"\n➕ TABLES EN PLUS DANS TEST ({len(missing_in_prod)}):")
-for table in sorted(missing_in_prod):
-    print(f"  - {table}")
-
-# Analyse de la table lofts
-prod_lofts = analyze_lofts_table(prod_data)
-test_lofts = analyze_lofts_table(test_data)
-
-print(f"\n🏠 ANALYSE TABLE LOFTS:")
-print(f"  - Colonnes en PROD: {len(prod_lofts)}")
-print(f"  - Colonnes en TEST: {len(test_lofts)}")
-
-if prod_lofts and test_lofts:
-    missing_lofts_cols = set(prod_lofts) - set(test_lofts)
-    if missing_lofts_cols:
-        print(f"  - Colonnes manquantes dans TEST:")
-        for col in sorted(missing_lofts_cols):
-            print(f"    • {col}")
-
-print(f"\n📈 RÉSUMÉ GLOBAL:")
-print(f"  - Total tables PROD: {len(prod_tables)}")
-print(f"  - Total tables TEST: {len(test_tables)}")
-print(f"  - Tables manquantes dans TEST: {len(missing_in_test)}")
-print(f"  - Synchronisation: {((len(test_tables)/len(prod_tables))*100):.1f}%")
\ No newline at end of file
+
+# Résultats déjà calculés, par clé d'appelant (les plus anciens sont évincés)
+CACHE_SIZE = 32
+_catalog_cache = OrderedDict()
+
+def aggregate_catalog(records):
+    """Parcourt les enregistrements une seule fois et calcule toutes les statistiques
+
+    Retourne un dictionnaire en lecture seule, partagé par le cache :
+      - 'schema_counts': {schéma: nombre de tables}
+      - 'tables': frozenset des tables au format schema.table
+      - 'columns': {schema.table: tuple des colonnes dans l'ordre du flux}
+    """
+    columns = defaultdict(list)
+    schema_tables = defaultdict(set)
+    for item in records:
+        schema = item['table_schema']
+        table = item['table_name']
+        schema_tables[schema].add(table)
+        columns[f"{schema}.{table}"].append(item['column_name'])
+
+    return MappingProxyType({
+        'schema_counts': MappingProxyType({schema: len(tables) for schema, tables in schema_tables.items()}),
+        'tables': frozenset(columns),
+        'columns': MappingProxyType({table: tuple(names) for table, names in columns.items()})
+    })
+
+def get_catalog_stats(records, fingerprint=None):
+    """Statistiques du catalogue, mémorisées sous la clé `fingerprint`
+
+    La clé est fournie par l'appelant et doit changer avec les données
+    (ex: chemin, taille et date d'un export). Sans clé, les enregistrements
+    sont agrégés directement : les hacher coûterait plus que l'agrégation.
+    """
+    if fingerprint is None:
+        return aggregate_catalog(records)
+
+    stats = _catalog_cache.get(fingerprint)
+    if stats is None:
+        stats = aggregate_catalog(records)
+        _catalog_cache[fingerprint] = stats
+        if len(_catalog_cache) > CACHE_SIZE:
+            _catalog_cache.popitem(last=False)
+    else:
+        _catalog_cache.move_to_end(fingerprint)
+    return stats
+
+def load_catalog(path):
+    """Charge un export JSON de information_schema.columns, mémorisé par (chemin, taille, date)"""
+    stat = os.stat(path)
+    fingerprint = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    stats = _catalog_cache.get(fingerprint)
+    if stats is not None:
+        _catalog_cache.move_to_end(fingerprint)
+        return stats
+    with open(path, 'r', encoding='utf-8') as f:
+        return get_catalog_stats(json.load(f), fingerprint)
+
+def catalog_to_json(stats):
+    """Copie modifiable et sérialisable en JSON de get_catalog_stats()
+
+    Les statistiques mémorisées sont des MappingProxyType et un frozenset, que
+    json.dumps() refuse : cette copie utilise des dict et des listes triées.
+    """
+    return {
+        'schema_counts': dict(stats['schema_counts']),
+        'tables': sorted(stats['tables']),
+        'columns': {table: list(names) for table, names in stats['columns'].items()}
+    }
+
+def table_columns(stats, tables):
+    """Colonnes triées d'une table ou d'un ensemble de tables (schema.table)"""
+    if isinstance(tables, str):
+        return sorted(stats['columns'].get(tables, ()))
+    return {table: sorted(stats['columns'].get(table, ())) for table in tables}
+
+def count_tables_by_schema(data, fingerprint=None):
+    """Compte les tables par schéma (mémorisé si `fingerprint` est fourni)"""
+    return dict(get_catalog_stats(data, fingerprint)['schema_counts'])
+
+def get_unique_tables(data, fingerprint=None):
+    """Récupère la liste unique des tables (mémorisé si `fingerprint` est fourni)"""
+    return sorted(get_catalog_stats(data, fingerprint)['tables'])
+
+def analyze_lofts_table(data, fingerprint=None):
+    """Analyse spécifique de la table lofts
+
+    Avec `fingerprint`, lit les statistiques mémorisées ; sans, filtre
+    directement la table lofts sans construire les colonnes des autres tables.
+    """
+    if fingerprint is not None:
+        return table_columns(get_catalog_stats(data, fingerprint), 'public.lofts')
+    return sorted(item['column_name'] for item in data
+                  if item['table_schema'] == 'public' and item['table_name'] == 'lofts')
+
+def run_analysis(prod_records, test_records):
+    """Affiche l'analyse rapide PROD vs TEST"""
+    prod_stats = get_catalog_stats(prod_records)
+    test_stats = get_catalog_stats(test_records)
+
+    print("=" * 60)
+    print("ANALYSE RAPIDE DES SCHÉMAS")
+    print("=" * 60)
+
+    # Compter les tables
+    prod_counts = prod_stats['schema_counts']
+    test_counts = test_stats['schema_counts']
+
+    print("\n📊 NOMBRE DE TABLES PAR SCHÉMA:")
+    print("SCHÉMA".ljust(20) + "PROD".ljust(10) + "TEST".ljust(10) + "DIFFÉRENCE")
+    print("-" * 50)
+
+    all_schemas = set(prod_counts) | set(test_counts)
+    for schema in sorted(all_schemas):
+        prod_count = prod_counts.get(schema, 0)
+        test_count = test_counts.get(schema, 0)
+        diff = prod_count - test_count
+        diff_str = f"+{diff}" if diff > 0 else str(diff) if diff < 0 else "="
+        print(f"{schema.ljust(20)}{str(prod_count).ljust(10)}{str(test_count).ljust(10)}{diff_str}")
+
+    # Tables uniques
+    prod_tables = prod_stats['tables']
+    test_tables = test_stats['tables']
+
+    missing_in_test = prod_tables - test_tables
+    missing_in_prod = test_tables - prod_tables
+
+    print(f"\n🚨 TABLES MANQUANTES DANS TEST ({len(missing_in_test)}):")
+    for table in sorted(missing_in_test):
+        print(f"  - {table}")
+
+    print(f"\n➕ TABLES EN PLUS DANS TEST ({len(missing_in_prod)}):")
+    for table in sorted(missing_in_prod):
+        print(f"  - {table}")
+
+    # Analyse de la table lofts
+    prod_lofts = table_columns(prod_stats, 'public.lofts')
+    test_lofts = table_columns(test_stats, 'public.lofts')
+
+    print(f"\n🏠 ANALYSE TABLE LOFTS:")
+    print(f"  - Colonnes en PROD: {len(prod_lofts)}")
+    print(f"  - Colonnes en TEST: {len(test_lofts)}")
+
+    if prod_lofts and test_lofts:
+        missing_lofts_cols = set(prod_lofts) - set(test_lofts)
+        if missing_lofts_cols:
+            print(f"  - Colonnes manquantes dans TEST:")
+            for col in sorted(missing_lofts_cols):
+                print(f"    • {col}")
+
+    print(f"\n📈 RÉSUMÉ GLOBAL:")
+    print(f"  - Total tables PROD: {len(prod_tables)}")
+    print(f"  - Total tables TEST: {len(test_tables)}")
+    print(f"  - Tables manquantes dans TEST: {len(missing_in_test)}")
+    print(f"  - Synchronisation: {((len(test_tables)/len(prod_tables))*100):.1f}%")
+
+if __name__ == "__main__":
+    run_analysis(prod_data, test_data)
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Service HTTP local de dérive des schémas entre environnements
+Usage:
+  python schema-drift-server.py --env prod=file:exports/prod.json --env test=file:exports/test.json
+  python schema-drift-server.py --env prod=dsn:postgresql://... --env test=dsn:postgresql://... --refresh 300
+
+Expose compare_schemas() et generate_report() (analyze-schema-differences.py)
+pour les pages d'administration Next.js :
+  GET /environments                    -> environnements connus et empreinte de leur schéma
+  GET /diff?from=prod&to=test          -> différences (JSON)
+  GET /report?from=prod&to=test        -> rapport texte
+  GET /health
+
+Le dernier schéma de chaque environnement est gardé en mémoire. Une source
+fichier n'est relue que si sa date de modification change ; une source base
+n'est réintrospectée qu'après --refresh secondes, et après un échec elle n'est
+retentée qu'au bout de --retry secondes. Les différences sont
+calculées table par table et mises en cache par empreinte de table : après un
+changement, seules les tables modifiées sont recomparées. Les réponses portent
+un ETag dérivé des deux empreintes, et If-None-Match renvoie 304 sans calcul.
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def load_script(filename):
+    """Importe un script voisin dont le nom contient des tirets"""
+    path = os.path.join(SCRIPTS_DIR, filename)
+    spec = importlib.util.spec_from_file_location(filename[:-3].replace('-', '_'), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+analysis = load_script('analyze-schema-differences.py')
+
+def fingerprint(value):
+    """Empreinte stable d'une structure JSON"""
+    payload = json.dumps(value, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()
+
+def from_schema_info(schema_info):
+    """Convertit la sortie de get_schema_info() au format de parse_schema_data()"""
+    return {
+        schema: {
+            table: {
+                column: {
+                    'data_type': spec['type'],
+                    'is_nullable': spec['nullable'],
+                    'column_default': spec['default'],
+                    'character_maximum_length': None
+                }
+                for column, spec in columns.items()
+            }
+            for table, columns in tables.items()
+        }
+        for schema, tables in schema_info.items()
+    }
+
+class UnknownEnvironment(Exception):
+    """Environnement absent de la configuration --env"""
+
+class FileSource:
+    """Export JSON local (lignes de information_schema.columns ou schéma déjà structuré)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.version = None
+
+    def changed(self, now):
+        stat = os.stat(self.path)
+        return (stat.st_size, stat.st_mtime) != self.version
+
+    def load(self):
+        stat = os.stat(self.path)
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        try:
+            schema = analysis.parse_schema_data(data) if isinstance(data, list) else data
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"Export invalide {self.path}: champ manquant ou mal formé {e}") from e
+        self.version = (stat.st_size, stat.st_mtime)
+        return schema
+
+    def describe(self):
+        return f"file:{self.path}"
+
+class DatabaseSource:
+    """Introspection directe via get_schema_info() (generate-schema-report.py)"""
+
+    def __init__(self, dsn, name, refresh, retry):
+        self.dsn = dsn
+        self.name = name
+        self.refresh = refresh
+        self.retry = retry
+        self.loaded_at = None
+        self.failed_at = None
+
+    def backing_off(self, now):
+        return self.failed_at is not None and now - self.failed_at < self.retry
+
+    def changed(self, now):
+        if self.backing_off(now):
+            return False
+        return self.loaded_at is None or now - self.loaded_at >= self.refresh
+
+    def load(self):
+        now = time.time()
+        if self.backing_off(now):
+            raise RuntimeError(f"Introspection impossible pour {self.name}, "
+                               f"nouvel essai dans {self.retry - (now - self.failed_at):.0f}s")
+        report = load_script('generate-schema-report.py')
+        schema_info = report.get_schema_info({'dsn': self.dsn}, self.name.upper())
+        if schema_info is None:
+            self.failed_at = time.time()
+            raise RuntimeError(f"Introspection impossible pour {self.name}")
+        self.loaded_at = time.time()
+        self.failed_at = None
+        return from_schema_info(schema_info)
+
+    def describe(self):
+        return "dsn"
+
+class SchemaDriftService:
+    """Cache des schémas par environnement et des différences par table"""
+
+    def __init__(self, sources):
+        self.sources = sources
+        self.snapshots = {}
+        self.table_diffs = {}
+        self.lock = threading.Lock()
+        self.load_locks = {env: threading.Lock() for env in sources}
+
+    def snapshot(self, env):
+        """Dernier schéma connu de l'environnement, rechargé si la source a changé
+
+        Le chargement se fait sous un verrou propre à l'environnement : une
+        introspection lente ne bloque ni les autres environnements ni les diffs.
+        """
+        if env not in self.sources:
+            raise UnknownEnvironment(env)
+        source = self.sources[env]
+        with self.load_locks[env]:
+            current = self.snapshots.get(env)
+            if current is not None and not source.changed(time.time()):
+                return current
+            schema = source.load()
+            tables = {
+                (schema_name, table): fingerprint(columns)
+                for schema_name, schema_tables in schema.items()
+                for table, columns in schema_tables.items()
+            }
+            digest = fingerprint(sorted(tables.items()))
+            if current is None or current['fingerprint'] != digest:
+                current = {
+                    'schema': schema,
+                    'tables': tables,
+                    'fingerprint': digest,
+                    'loaded_at': time.time()
+                }
+                with self.lock:
+                    self.snapshots[env] = current
+                    self.prune_table_diffs()
+            return current
+
+    def prune_table_diffs(self):
+        """Oublie les différences dont une empreinte n'appartient plus à aucun schéma courant"""
+        live = {
+            (key, table_fingerprint)
+            for snapshot in self.snapshots.values()
+            for key, table_fingerprint in snapshot['tables'].items()
+        }
+        self.table_diffs = {
+            cache_key: diff
+            for cache_key, diff in self.table_diffs.items()
+            if all(fp is None or (cache_key[0], fp) in live for fp in cache_key[1:])
+        }
+
+    def etag(self, prod, test, representation):
+        """ETag d'une représentation (diff ou rapport) pour un couple de schémas"""
+        key = f"{representation}:{prod['fingerprint']}:{test['fingerprint']}"
+        return '"' + hashlib.sha256(key.encode('utf-8')).hexdigest()[:32] + '"'
+
+    def table_diff(self, key, prod, test):
+        """Différences d'une seule table, mises en cache par couple d'empreintes"""
+        cache_key = (key, prod['tables'].get(key), test['tables'].get(key))
+        diff = self.table_diffs.get(cache_key)
+        if diff is None:
+            schema_name, table = key
+            prod_part = {schema_name: {table: prod['schema'][schema_name][table]}} if cache_key[1] else {}
+            test_part = {schema_name: {table: test['schema'][schema_name][table]}} if cache_key[2] else {}
+            diff = analysis.compare_schemas(prod_part, test_part)
+            self.table_diffs[cache_key] = diff
+        return diff
+
+    def diff(self, prod, test):
+        """Fusionne les différences par table, dans l'ordre schema.table"""
+        differences = {
+            'missing_tables_in_test': [],
+            'missing_tables_in_prod': [],
+            'missing_columns_in_test': [],
+            'missing_columns_in_prod': [],
+            'column_type_differences': [],
+        }
+        with self.lock:
+            for key in sorted(set(prod['tables']) | set(test['tables'])):
+                diff = self.table_diff(key, prod, test)
+                for name in differences:
+                    differences[name].extend(diff[name])
+
+        differences['summary'] = {
+            'total_missing_tables_in_test': len(differences['missing_tables_in_test']),
+            'total_missing_tables_in_prod': len(differences['missing_tables_in_prod']),
+            'total_missing_columns_in_test': len(differences['missing_columns_in_test']),
+            'total_missing_columns_in_prod': len(differences['missing_columns_in_prod']),
+            'total_type_differences': len(differences['column_type_differences'])
+        }
+        return differences
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def send_body(self, status, body, content_type, etag=None):
+            payload = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+            self.send_header('Content-Length', str(len(payload)))
+            self.send_header('Cache-Control', 'no-cache')
+            if etag:
+                self.send_header('ETag', etag)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def send_json(self, status, data, etag=None):
+            self.send_body(status, json.dumps(data, ensure_ascii=False, indent=2), 'application/json', etag)
+
+        def not_modified(self, etag):
+            matches = [tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')]
+            if etag in matches or '*' in matches:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return True
+            return False
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            try:
+                if url.path == '/health':
+                    return self.send_json(200, {'status': 'ok'})
+
+                if url.path == '/environments':
+                    environments = {}
+                    for env, source in service.sources.items():
+                        snapshot = service.snapshot(env)
+                        environments[env] = {
+                            'source': source.describe(),
+                            'fingerprint': snapshot['fingerprint'],
+                            'loaded_at': snapshot['loaded_at']
+                        }
+                    return self.send_json(200, environments)
+
+                if url.path in ('/diff', '/report'):
+                    prod = service.snapshot(query.get('from', ['prod'])[0])
+                    test = service.snapshot(query.get('to', ['test'])[0])
+                    etag = service.etag(prod, test, url.path)
+                    if self.not_modified(etag):
+                        return
+                    differences = service.diff(prod, test)
+                    if url.path == '/diff':
+                        return self.send_json(200, differences, etag)
+                    return self.send_body(200, analysis.generate_report(differences), 'text/plain', etag)
+
+                self.send_json(404, {'error': f"Route inconnue: {url.path}"})
+            except UnknownEnvironment as e:
+                self.send_json(404, {'error': f"Environnement inconnu: {e.args[0]}"})
+            except Exception as e:
+                self.send_json(502, {'error': str(e)})
+
+        def log_message(self, format, *args):
+            print(f"[{self.log_date_time_string()}] {format % args}")
+
+    return Handler
+
+def parse_sources(values, refresh, retry):
+    """Parse les arguments --env au format nom=file:chemin ou nom=dsn:chaîne"""
+    sources = {}
+    for value in values:
+        env, sep, spec = value.partition('=')
+        kind, _, target = spec.partition(':')
+        if not sep or not target or kind not in ('file', 'dsn'):
+            raise ValueError(f"Environnement invalide (attendu nom=file:chemin ou nom=dsn:chaîne): {value}")
+        if kind == 'file':
+            sources[env] = FileSource(target)
+        else:
+            sources[env] = DatabaseSource(target, env, refresh, retry)
+    return sources
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Service HTTP de dérive des schémas")
+    parser.add_argument('--env', action='append', required=True,
+                        help="Source d'un environnement: nom=file:export.json ou nom=dsn:postgresql://...")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--refresh', type=float, default=300,
+                        help="Délai minimal (s) entre deux introspections d'une base")
+    parser.add_argument('--retry', type=float, default=30,
+                        help="Délai (s) avant de retenter une introspection en échec")
+    args = parser.parse_args(argv)
+
+    service = SchemaDriftService(parse_sources(args.env, args.refresh, args.retry))
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    print(f"🔍 Service de dérive des schémas sur http://{args.host}:{args.port}")
+    print(f"Environnements: {', '.join(service.sources)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nArrêt du service")
+    finally:
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
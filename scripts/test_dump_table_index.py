@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests de l'indexation des dumps SQL (dump-table-index.py)
+Usage: python -m pytest scripts/test_dump_table_index.py
+"""
+
+import importlib.util
+import io
+import os
+import tempfile
+import unittest
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+spec = importlib.util.spec_from_file_location('dump_table_index', os.path.join(SCRIPTS_DIR, 'dump-table-index.py'))
+dump_index = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(dump_index)
+
+COMMENTED_DUMP = b"""-- Sauvegarde de l'environnement PROD
+/* Les tables d'aujourd'hui ; /* imbriqu\xc3\xa9 */ toujours */
+CREATE TABLE public.lofts (
+    id int, -- l'identifiant du loft
+    name text DEFAULT 'a;b', /* l'adresse ; plus tard */
+    note text DEFAULT E'it\\'s; ok'
+);
+CREATE FUNCTION public.touch() RETURNS trigger AS $body$
+BEGIN
+    INSERT INTO public.audit VALUES ('x;');
+    RETURN NEW;
+END;
+$body$ LANGUAGE plpgsql;
+COPY public.lofts (id, name) FROM stdin;
+1\tl'appart ; centre
+\\.
+INSERT INTO public.t VALUES ('x;''y');
+INSERT INTO public.t VALUES (2);
+CREATE TABLE "public"."other" (id int);
+"""
+
+def index_of(content):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'dump.sql')
+        with open(path, 'wb') as f:
+            f.write(content)
+        mm = dump_index.open_dump(path)
+        try:
+            index = dump_index.load_index(path, mm)
+            return index, bytes(mm)
+        finally:
+            mm.close()
+
+def section(data, entry):
+    return data[entry['start']:entry['end']]
+
+class DumpIndexTest(unittest.TestCase):
+
+    def test_comments_strings_and_dollar_quotes(self):
+        index, data = index_of(COMMENTED_DUMP)
+        tables = index['tables']
+
+        self.assertEqual(sorted(tables), ['public.lofts', 'public.other', 'public.t'])
+        self.assertEqual([e['kind'] for e in tables['public.lofts']], ['create', 'copy'])
+
+        create = section(data, tables['public.lofts'][0])
+        self.assertTrue(create.startswith(b'CREATE TABLE public.lofts'))
+        self.assertTrue(create.endswith(b');'))
+
+        copy = tables['public.lofts'][1]
+        self.assertEqual(data[copy['data_start']:copy['data_end']], b"1\tl'appart ; centre\n")
+
+        self.assertEqual(len(tables['public.t']), 1)
+        self.assertTrue(section(data, tables['public.t'][0]).endswith(b'VALUES (2);'))
+        self.assertNotIn('public.audit', tables)
+
+    def test_crlf_copy_blocks(self):
+        content = (b"COPY public.a (id) FROM stdin;\r\n1\r\n2\r\n\\.\r\n"
+                   b"COPY public.b (id) FROM stdin;\r\n3\r\n\\.\r\n")
+        index, data = index_of(content)
+
+        self.assertEqual(sorted(index['tables']), ['public.a', 'public.b'])
+        first = index['tables']['public.a'][0]
+        self.assertEqual(data[first['data_start']:first['data_end']], b"1\r\n2\r\n")
+
+    def test_extract_and_unknown_table(self):
+        index, data = index_of(COMMENTED_DUMP)
+        output = io.BytesIO()
+        dump_index.extract_tables(data, index, dump_index.resolve_tables(index, ['t']), output)
+        self.assertIn(b"INSERT INTO public.t VALUES (2);", output.getvalue())
+        self.assertNotIn(b'COPY', output.getvalue())
+
+        with self.assertRaises(KeyError):
+            dump_index.resolve_tables(index, ['missing'])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Tests de l'ordonnancement de la copie parallèle (parallel-copy-clone.py)
+Usage: python -m pytest scripts/test_parallel_copy_clone.py
+"""
+
+import importlib.util
+import os
+import unittest
+
+from psycopg2 import sql
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+spec = importlib.util.spec_from_file_location('parallel_copy_clone', os.path.join(SCRIPTS_DIR, 'parallel-copy-clone.py'))
+clone = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(clone)
+
+TABLES = ['auth.users', 'public.lofts', 'public.owners', 'public.payments', 'public.transactions']
+
+FOREIGN_KEYS = [
+    {'table': 'public.lofts', 'columns': ['owner_id'], 'ref_table': 'public.owners', 'ref_columns': ['id']},
+    {'table': 'public.transactions', 'columns': ['loft_id'], 'ref_table': 'public.lofts', 'ref_columns': ['id']},
+    {'table': 'public.transactions', 'columns': ['user_id'], 'ref_table': 'auth.users', 'ref_columns': ['id']},
+    {'table': 'public.payments', 'columns': ['transaction_id'], 'ref_table': 'public.transactions', 'ref_columns': ['id']},
+]
+
+def render(composable):
+    """Texte d'une requête psycopg2.sql sans connexion (identifiants entre guillemets)"""
+    if isinstance(composable, sql.Composed):
+        return ''.join(render(part) for part in composable.seq)
+    if isinstance(composable, sql.Identifier):
+        return '.'.join(f'"{part}"' for part in composable.strings)
+    return composable.string
+
+class SchedulingTest(unittest.TestCase):
+
+    def test_topological_order_follows_foreign_keys(self):
+        order = clone.topological_order(clone.build_dependencies(TABLES, FOREIGN_KEYS))
+
+        self.assertEqual(sorted(order), TABLES)
+        for fk in FOREIGN_KEYS:
+            self.assertLess(order.index(fk['ref_table']), order.index(fk['table']))
+
+    def test_topological_order_places_cycles_last(self):
+        order = clone.topological_order({'a': {'b'}, 'b': {'a'}, 'c': set()})
+        self.assertEqual(order, ['c', 'a', 'b'])
+
+    def test_select_tables_with_dependents(self):
+        self.assertEqual(clone.select_tables(TABLES, FOREIGN_KEYS, ['public.lofts']), ['public.lofts'])
+        self.assertEqual(
+            clone.select_tables(TABLES, FOREIGN_KEYS, ['public.lofts'], with_dependents=True),
+            ['public.lofts', 'public.payments', 'public.transactions']
+        )
+        with self.assertRaises(ValueError):
+            clone.select_tables(TABLES, FOREIGN_KEYS, ['public.lofs'])
+
+    def test_row_filters_follow_two_levels_of_foreign_keys(self):
+        order = clone.topological_order(clone.build_dependencies(TABLES, FOREIGN_KEYS))
+        row_filters = clone.build_row_filters(order, FOREIGN_KEYS, {'public.lofts': "status = 'available'"})
+
+        self.assertEqual(sorted(row_filters), ['public.lofts', 'public.payments', 'public.transactions'])
+        transactions = render(row_filters['public.transactions'][0])
+        self.assertIn('("loft_id") IN (SELECT "id" FROM "public"."lofts" WHERE (status = \'available\'))', transactions)
+        payments = render(row_filters['public.payments'][0])
+        self.assertIn('FROM "public"."transactions" WHERE', payments)
+        self.assertIn(transactions, payments)
+
+    def test_restrict_dependencies_to_copied_tables(self):
+        dependencies = clone.build_dependencies(TABLES, FOREIGN_KEYS)
+        order = [table for table in clone.topological_order(dependencies) if table != 'auth.users']
+        restricted = clone.restrict_dependencies(dependencies, order)
+
+        self.assertEqual(sorted(restricted), sorted(order))
+        self.assertEqual(restricted['public.transactions'], {'public.lofts'})
+        # Sans auth.users, l'ordre reste acyclique : aucune table n'est bloquée
+        self.assertEqual(clone.topological_order(restricted), order)
+
+class CopyPlanTest(unittest.TestCase):
+
+    def test_match_columns_flags_type_differences(self):
+        source = {'id': 'pg_catalog.uuid', 'price': 'pg_catalog.numeric', 'legacy': 'pg_catalog.text'}
+        target = {'price': 'pg_catalog.int4', 'id': 'pg_catalog.uuid'}
+        self.assertEqual(clone.match_columns(source, target), (['id', 'price'], ['legacy'], ['price']))
+
+    def test_copy_error_prefers_the_real_cause(self):
+        target_error = RuntimeError('permission denied for table lofts')
+        source_error = RuntimeError('canceling statement due to statement timeout')
+        broken_pipe = BrokenPipeError(32, 'Broken pipe')
+        eof = RuntimeError('unexpected EOF in COPY data')
+
+        self.assertIs(clone.copy_error(broken_pipe, target_error), target_error)
+        self.assertIs(clone.copy_error(source_error, eof), source_error)
+        self.assertIs(clone.copy_error(None, target_error), target_error)
+        self.assertIsNone(clone.copy_error(None, None))
+
+if __name__ == "__main__":
+    unittest.main()